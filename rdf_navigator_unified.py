@@ -1,27 +1,54 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from rdflib import Graph
 from rdflib.plugins.stores.sparqlstore import SPARQLStore
 import requests
 import io
-import tempfile
 import os
 import re
 from datetime import datetime
 import json
 import hashlib
+import string
+import sys
+import functools
+import heapq
+import bisect
+import itertools
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Stores that evaluate SPARQL with their own engine rather than rdflib's
+try:
+    import oxrdflib  # registers the Rust-backed "Oxigraph" rdflib store
+    _LOCAL_STORE = "Oxigraph"
+    _SPARQL_ENGINE_STORES = (SPARQLStore, oxrdflib.OxigraphStore)
+except ImportError:
+    _LOCAL_STORE = "default"
+    _SPARQL_ENGINE_STORES = (SPARQLStore,)
+
+# Files larger than this are converted in chunks of _CSV_CHUNK_ROWS rows
+_CSV_CHUNK_BYTES = 64 * 1024 * 1024
+_CSV_CHUNK_ROWS = 100_000
 
 # --- Session State Initialization ---
 if 'current_resource_uri' not in st.session_state:
     st.session_state.current_resource_uri = None
 if 'navigation_history' not in st.session_state:
-    st.session_state.navigation_history = []
+    st.session_state.navigation_history = {}
+if 'store_version' not in st.session_state:
+    st.session_state.store_version = 0
+if 'handled_node_click' not in st.session_state:
+    st.session_state.handled_node_click = ''
 
 # --- File Management System ---
 class FileManager:
     def __init__(self, storage_file="uploaded_files.json"):
         self.storage_file = storage_file
         self.files = self.load_files()
+        self._by_id = {f['id']: f for f in self.files}
     
     def load_files(self):
         """Load uploaded files metadata from storage"""
@@ -41,9 +68,13 @@ class FileManager:
         except Exception as e:
             st.error(f"Error saving file metadata: {e}")
     
-    def add_file(self, filename, file_content, ttl_data, triple_count=None):
+    def add_file(self, filename, file_content, ttl_data, triple_count=None, file_hash=None):
         """Add a new uploaded file to tracking"""
-        file_hash = hashlib.md5(file_content.encode()).hexdigest()
+        if file_hash is None:
+            file_hash = hashlib.md5(file_content.encode()).hexdigest()
+        # Check if file already exists
+        if file_hash in self._by_id:
+            return file_hash
         file_info = {
             'id': file_hash,
             'filename': filename,
@@ -54,12 +85,8 @@ class FileManager:
             'ttl_data': ttl_data  # Store TTL data for reference
         }
         
-        # Check if file already exists
-        for existing_file in self.files:
-            if existing_file['id'] == file_hash:
-                return existing_file['id']
-        
         self.files.append(file_info)
+        self._by_id[file_hash] = file_info
         self.save_files()
         return file_hash
     
@@ -70,68 +97,163 @@ class FileManager:
     def delete_file(self, file_id):
         """Delete a file from tracking"""
         self.files = [f for f in self.files if f['id'] != file_id]
+        self._by_id.pop(file_id, None)
+        self.save_files()
+    
+    def clear_files(self):
+        """Stop tracking all files"""
+        self.files = []
+        self._by_id = {}
         self.save_files()
     
     def get_file_by_id(self, file_id):
         """Get file info by ID"""
-        for file in self.files:
-            if file['id'] == file_id:
-                return file
-        return None
+        return self._by_id.get(file_id)
 
 # Initialize file manager
 file_manager = FileManager()
 
 # --- CSV to RDF Converter Logic (from csv_to_rdf_converter.py) ---
+_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_')
+
+class _IdentifierTable(dict):
+    """str.translate table that maps every non-identifier character to '_'"""
+    def __missing__(self, codepoint):
+        self[codepoint] = codepoint if chr(codepoint) in _ID_CHARS else ord('_')
+        return self[codepoint]
+
+_ID_TABLE = _IdentifierTable()
+
+# Date formats recognised in CSV values, tried in order
+_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d')
+
+# Value prefixes that mark a reference to another entity, checked in this order
+_ENTITY_TAGS = ('IR', 'ER', 'Module', 'Customer')
+_ENTITY_RE = re.compile('^(' + '|'.join(_ENTITY_TAGS) + ')')
+
+@functools.lru_cache(maxsize=8192)
+def _clean_id(identifier):
+    return identifier.translate(_ID_TABLE)
+
+def _common_dtype(chunks):
+    """The dtype a whole-file read gives a column, from the (dtype, holds only
+    booleans, has negatives) triple of each chunk; None for booleans mixed
+    with blanks, which the parser keeps as bool objects only when left to
+    infer them"""
+    dtypes = [dtype for dtype, boolean, negative in chunks]
+    same = all(dtype == dtypes[0] for dtype in dtypes)
+    if all(boolean for dtype, boolean, negative in chunks) and (not same or dtypes[0] == object):
+        return None
+    if same:
+        return dtypes[0]
+    if all(dtype.kind in 'iu' for dtype in dtypes):
+        # Integers past int64 stay unsigned unless the column also has negatives
+        if any(dtype.kind == 'u' for dtype in dtypes):
+            return np.dtype(np.uint64) if not any(negative for dtype, boolean, negative in chunks) else object
+        return np.result_type(*dtypes)
+    if all(dtype.kind in 'iuf' for dtype in dtypes):
+        return np.result_type(*dtypes)
+    # Mixed text and numbers: every cell stays as written
+    return object
+
 class CSVToRDFConverter:
     def __init__(self, namespace="http://example.org/dassault#", prefix="ex"):
         self.namespace = namespace
         self.prefix = prefix
-    def clean_text(self, text):
-        if pd.isna(text) or text is None:
-            return ""
-        text = str(text).strip()
-        text = text.replace('\\', '\\\\').replace('"', '\\"')
-        return text
-    def format_date(self, date_str):
-        if pd.isna(date_str) or not date_str:
-            return ""
-        for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d']:
-            try:
-                date_obj = datetime.strptime(str(date_str), fmt)
-                return date_obj.strftime('%d-%m-%Y')
-            except ValueError:
-                continue
-        return str(date_str)
+        # Statement templates are specialised for the prefix once, not per row
+        self._pred_lead = "    " + prefix + ":"
+    def clean_column(self, series):
+        """Strip and escape a whole column for use in Turtle string literals"""
+        cleaned = series.astype(str).str.strip()
+        cleaned = cleaned.str.replace('\\', '\\\\', regex=False).str.replace('"', '\\"', regex=False)
+        return cleaned.where(series.notna(), "")
+    def parse_dates(self, values):
+        """Map each distinct date-like value to its dd-mm-YYYY form"""
+        values = pd.Series(pd.unique(values), dtype=object)
+        # Every supported format contains digits; each later format only
+        # sees the values the earlier ones could not parse
+        pending = values[values.str.contains(r'\d', regex=True)]
+        dates = {}
+        for fmt in _DATE_FORMATS:
+            if pending.empty:
+                break
+            attempt = pd.to_datetime(pending, format=fmt, errors='coerce')
+            found = attempt.notna()
+            dates.update(zip(pending[found], attempt[found].dt.strftime('%d-%m-%Y')))
+            pending = pending[~found]
+        return dates
     def create_uri(self, entity_type, identifier):
-        clean_id = re.sub(r'[^a-zA-Z0-9_]', '_', str(identifier))
-        return f"{self.prefix}:{entity_type}_{clean_id}"
-    def write_prefixes(self, output):
-        output.write(f"@prefix {self.prefix}: <{self.namespace}> .\n")
-        output.write("@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n")
-        output.write("@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n\n")
-    def is_date(self, val):
-        if pd.isna(val) or not val:
-            return False
-        for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d']:
-            try:
-                _ = datetime.strptime(str(val), fmt)
-                return True
-            except ValueError:
-                continue
-        return False
+        return f"{self.prefix}:{entity_type}_{_clean_id(str(identifier))}"
+    def write_prefixes(self, buf):
+        buf.append(f"@prefix {self.prefix}: <{self.namespace}> .\n"
+                   "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n"
+                   "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n\n")
     def guess_entity_type(self, val):
         # Guess entity type from value pattern
-        if isinstance(val, str):
-            if val.startswith('IR_') or val.startswith('IR'):
-                return 'IR'
-            if val.startswith('ER_') or val.startswith('ER'):
-                return 'ER'
-            if val.startswith('Module_') or val.startswith('Module'):
-                return 'Module'
-            if val.startswith('Customer_') or val.startswith('Customer'):
-                return 'Customer'
-        return None
+        match = _ENTITY_RE.match(val) if isinstance(val, str) else None
+        return match.group(1) if match else None
+    def object_terms(self, series):
+        """Map each distinct value of a text column to the Turtle terms
+        written for its comma-separated parts"""
+        cells = pd.Series(pd.unique(series.dropna().astype(str)), dtype=object)
+        multi = cells.str.contains(',', regex=False)
+        # Multi-valued cells are split in one pass; the index keeps each part's cell
+        parts = cells[multi].str.split(',').explode().str.strip()
+        parts = parts[parts != '']
+        values = pd.Series(pd.unique(pd.concat([cells[~multi], parts])), dtype=object)
+        # Each value is classified by whole-column masks, first match wins:
+        # an entity reference, a URI, a date, else a plain literal
+        entity_types = values.str.extract(_ENTITY_RE, expand=False).fillna('').to_numpy(dtype=object)
+        is_entity = entity_types != ''
+        is_link = values.str.startswith(('http', 'ex:')).to_numpy(dtype=bool)
+        dates = values.map(self.parse_dates(values))
+        is_date = dates.notna().to_numpy()
+        # Entity URIs repeat across rows and files, so share one interned copy
+        entity_uris = [sys.intern(f"{self.prefix}:{ent_type}_{_clean_id(v)}") if ent_type else ''
+                       for ent_type, v in zip(entity_types, values)]
+        terms = dict(zip(values, np.select(
+            [is_entity, is_link, is_date],
+            [np.array(entity_uris, dtype=object), values.to_numpy(dtype=object),
+             ('"' + dates.fillna('') + '"^^xsd:date').to_numpy(dtype=object)],
+            default=('"' + self.clean_column(values) + '"').to_numpy(dtype=object))))
+        by_cell = dict.fromkeys(cells[multi], [])
+        by_cell.update((v, [terms[v]]) for v in cells[~multi])
+        grouped = parts.map(terms).groupby(level=0, sort=False).agg(list)
+        by_cell.update(zip(cells[grouped.index], grouped))
+        return by_cell
+    def read_csv_chunks(self, csv_file):
+        """Yield a CSV as DataFrames, streaming large files in row chunks; both
+        go through pandas' C parser, so a file converts the same at any size"""
+        csv_file.seek(0, io.SEEK_END)
+        size = csv_file.tell()
+        csv_file.seek(0)
+        if size > _CSV_CHUNK_BYTES:
+            # Large files are parsed a chunk at a time to keep memory bounded.
+            # Each chunk would infer its own dtypes, so a first pass settles
+            # one dtype per column and every chunk is read with it, as a
+            # whole-file read would
+            chunk_dtypes = {}
+            for chunk in pd.read_csv(csv_file, chunksize=_CSV_CHUNK_ROWS):
+                for col, values in chunk.items():
+                    boolean = values.isna().all() or pd.api.types.infer_dtype(values, skipna=True) == 'boolean'
+                    negative = values.dtype.kind == 'i' and bool((values < 0).any())
+                    chunk_dtypes.setdefault(col, []).append((values.dtype, boolean, negative))
+            dtypes = {col: _common_dtype(found) for col, found in chunk_dtypes.items()}
+            booleans = [col for col, dtype in dtypes.items() if dtype is None]
+            dtypes = {col: dtype for col, dtype in dtypes.items() if dtype is not None}
+            csv_file.seek(0)
+            for chunk in pd.read_csv(csv_file, chunksize=_CSV_CHUNK_ROWS, dtype=dtypes):
+                if booleans:
+                    chunk[booleans] = chunk[booleans].astype(object)
+                yield chunk
+        else:
+            yield pd.read_csv(csv_file)
+    def present_mask(self, series):
+        """Flags marking the cells of a column that hold a non-blank value"""
+        mask = series.notna()
+        if not pd.api.types.is_numeric_dtype(series):
+            mask &= series.astype(str).str.strip() != ''
+        return mask.to_numpy(dtype=bool)
     def get_id_column(self, df):
         # Prefer first column ending with _ID, or named ER, IR, incident, enhancement
         for col in df.columns:
@@ -143,61 +265,92 @@ class CSVToRDFConverter:
         # Fallback: first column
         return df.columns[0]
     def convert_csvs_to_ttl(self, csv_files, source_file_id=None):
-        output = io.StringIO()
-        self.write_prefixes(output)
-        for csv_file in csv_files:
-            try:
-                df = pd.read_csv(csv_file)
-                df.columns = [col.strip() for col in df.columns]
-                id_col = self.get_id_column(df)
-                for _, row in df.iterrows():
-                    if pd.isna(row[id_col]) or not str(row[id_col]).strip():
-                        continue
-                    subj_val = str(row[id_col]).strip()
-                    # Guess entity type from ID column name or value
-                    entity_type = None
-                    if id_col.lower().endswith('_id'):
-                        entity_type = id_col[:-3].capitalize()
-                    else:
-                        entity_type = self.guess_entity_type(subj_val) or id_col.capitalize()
-                    subj_uri = self.create_uri(entity_type, subj_val)
-                    output.write(f"{subj_uri} a {self.prefix}:{entity_type} ;\n")
-                    
-                    # Add source file tracking if provided
-                    if source_file_id:
-                        output.write(f"    {self.prefix}:sourceFile \"{source_file_id}\" ;\n")
-                    
-                    for col in df.columns:
-                        if col == id_col or pd.isna(row[col]) or str(row[col]).strip() == '':
-                            continue
-                        pred = self.prefix + ":" + re.sub(r'[^a-zA-Z0-9_]', '_', col.strip())
-                        val = row[col]
-                        # Handle multi-valued fields
-                        values = [v.strip() for v in str(val).split(',')] if isinstance(val, str) and ',' in str(val) else [val]
-                        for v in values:
-                            if pd.isna(v) or v == '':
-                                continue
-                            # If value looks like an entity, treat as object property
-                            ent_type = self.guess_entity_type(v)
-                            if ent_type:
-                                obj_uri = self.create_uri(ent_type, v)
-                                output.write(f"    {pred} {obj_uri} ;\n")
-                            elif isinstance(v, str) and (v.startswith('http') or v.startswith('ex:')):
-                                output.write(f"    {pred} {v} ;\n")
-                            else:
-                                # Guess datatype
-                                if isinstance(v, (int, float)):
-                                    dtype = '"' + str(v) + '"^^xsd:float' if isinstance(v, float) else '"' + str(v) + '"^^xsd:integer'
-                                elif self.is_date(v):
-                                    dtype = f'"{self.format_date(v)}"^^xsd:date'
-                                else:
-                                    dtype = f'"{self.clean_text(v)}"'
-                                output.write(f"    {pred} {dtype} ;\n")
-                    output.seek(output.tell() - 2)
-                    output.write(" .\n\n")
-            except Exception as e:
+        return self.convert_csvs(csv_files, source_file_id)[0]
+    def convert_csvs(self, csv_files, source_file_id=None):
+        """Convert CSV files to Turtle, returning the document and its triple count"""
+        # Subject blocks are accumulated and joined once at the end
+        buf = []
+        triple_count = 0
+        self.write_prefixes(buf)
+        for body, count in self.convert_each(csv_files, [source_file_id] * len(csv_files), prefixes=False):
+            buf.append(body)
+            triple_count += count
+        return "".join(buf), triple_count
+    def convert_each(self, csv_files, source_file_ids, prefixes=True):
+        """Convert each CSV on its own, returning a (ttl, triple_count) pair per file"""
+        conversions = []
+        for csv_file, source_file_id in zip(csv_files, source_file_ids):
+            buf = []
+            if prefixes:
+                self.write_prefixes(buf)
+            triple_count = self.convert_file(csv_file, buf, source_file_id)
+            conversions.append(("".join(buf), triple_count))
+        return conversions
+    def convert_file(self, csv_file, buf, source_file_id=None):
+        """Append the Turtle for one CSV file to buf, returning its triple count"""
+        triple_count = 0
+        # Add source file tracking if provided
+        source_line = f"{self._pred_lead}sourceFile \"{source_file_id}\"" if source_file_id else None
+        try:
+            for df in self.read_csv_chunks(csv_file):
+                triple_count += self.convert_frame(df, buf, source_line)
+        except (ValueError, LookupError, TypeError, OSError):
+            # Unreadable or malformed CSVs (ValueError covers pandas parser,
+            # empty-file and decode errors) are skipped
+            pass
+        return triple_count
+    def convert_frame(self, df, buf, source_line=None):
+        """Append the Turtle for one DataFrame to buf, returning its triple count"""
+        df.columns = [col.strip() for col in df.columns]
+        id_col = self.get_id_column(df)
+        subjects = df[id_col].astype(str).str.strip().where(df[id_col].notna(), '')
+        keep = (subjects != '').to_numpy()
+        if not keep.any():
+            return 0
+        df = df[keep]
+        subjects = subjects[keep]
+        # Guess entity type from ID column name or value; the value only
+        # matters when the id column name does not already end in _id
+        if id_col.lower().endswith('_id'):
+            entity_types = pd.Series(id_col[:-3].capitalize(), index=subjects.index)
+        else:
+            entity_types = subjects.str.extract(_ENTITY_RE, expand=False).fillna(id_col.capitalize())
+        # Each subject block is built a column at a time: every column adds
+        # its statements to the rows where it has a value, so the work is a
+        # few whole-column string operations instead of a loop over cells
+        blocks = (self.prefix + ':' + entity_types + '_' + subjects.map(_clean_id)
+                  + ' a ' + self.prefix + ':' + entity_types).to_numpy(dtype=object)
+        counts = np.ones(len(blocks), dtype=np.int64)
+        if source_line:
+            blocks += ' ;\n' + source_line
+            counts += 1
+        for col in df.columns:
+            if col == id_col:
                 continue
-        return output.getvalue()
+            series = df[col]
+            present = self.present_mask(series)
+            if not present.any():
+                continue
+            pred = self._pred_lead + _clean_id(col)
+            # Booleans next to blanks come back as an object column of bools;
+            # they are written like a bool column, as typed literals
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.infer_dtype(series, skipna=True) == 'boolean':
+                # Numeric column: typed literal
+                suffix = '"^^xsd:float' if pd.api.types.is_float_dtype(series) else '"^^xsd:integer'
+                values = series[present].tolist()
+                blocks[present] += np.array([f' ;\n{pred} "{value}{suffix}' for value in values], dtype=object)
+                counts[present] += 1
+                continue
+            # Multi-valued fields were split when the terms were built, so
+            # each distinct cell maps to its finished statements
+            terms = self.object_terms(series)
+            statements = {cell: ''.join(f' ;\n{pred} {term}' for term in cell_terms)
+                          for cell, cell_terms in terms.items()}
+            cells = series[present].astype(str)
+            blocks[present] += cells.map(statements).to_numpy(dtype=object)
+            counts[present] += cells.map(lambda cell: len(terms[cell])).to_numpy(dtype=np.int64)
+        buf.append(' .\n\n'.join(blocks) + ' .\n\n')
+        return int(counts.sum())
 
 # --- Streamlit App ---
 st.set_page_config(page_title="Unified RDF Navigator", layout="wide")
@@ -211,6 +364,13 @@ data_url = store_url.rstrip("/") + "/data"
 sparql_url = store_url.rstrip("/") + "/sparql"
 update_url = store_url.rstrip("/") + "/update"
 
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """One keep-alive session for the app's calls to the store, so
+    connections are reused across requests and reruns"""
+    return requests.Session()
+store_session = get_http_session()
+
 # Sidebar: Data Management
 st.sidebar.header("Data Management")
 
@@ -245,10 +405,11 @@ if uploaded_files_list:
                         ?s <http://example.org/dassault#sourceFile> "{file_info['id']}" .
                     }}
                     """
-                    resp = requests.post(update_url, data={"update": delete_query})
+                    resp = store_session.post(update_url, data={"update": delete_query})
                     if resp.status_code == 200:
                         # Remove file from tracking
                         file_manager.delete_file(file_info['id'])
+                        st.session_state.store_version += 1
                         st.sidebar.success(f"Deleted {file_info['filename']} and its triples!")
                         st.rerun()
                     else:
@@ -264,11 +425,11 @@ st.sidebar.divider()
 if st.sidebar.button("Clear All Data in Triple Store"):
     # Use SPARQL Update to clear all data
     clear_query = "CLEAR ALL"
-    resp = requests.post(update_url, data={"update": clear_query})
+    resp = store_session.post(update_url, data={"update": clear_query})
     if resp.status_code == 200:
         # Also clear file tracking
-        file_manager.files = []
-        file_manager.save_files()
+        file_manager.clear_files()
+        st.session_state.store_version += 1
         st.sidebar.success("Triple store and file tracking cleared!")
         st.rerun()
     else:
@@ -277,7 +438,7 @@ if st.sidebar.button("Clear All Data in Triple Store"):
 if st.sidebar.button("Download All Data (TTL)"):
     # Download all data as Turtle
     headers = {"Accept": "text/turtle"}
-    resp = requests.get(data_url, headers=headers)
+    resp = store_session.get(data_url, headers=headers)
     if resp.status_code == 200:
         st.sidebar.download_button(
             label="Download RDF Data (TTL)",
@@ -289,6 +450,17 @@ if st.sidebar.button("Download All Data (TTL)"):
         st.sidebar.error(f"Failed to download: {resp.text}")
 
 # --- CSV Upload and Conversion ---
+# Characters of Turtle encoded per chunk of a streamed upload
+_UPLOAD_CHUNK_CHARS = 1 << 20
+# Lines of the converted Turtle shown after an upload
+_PREVIEW_LINES = 200
+
+def iter_utf8(text, size=_UPLOAD_CHUNK_CHARS):
+    """Encode text a slice at a time, so it can be sent as a chunked request
+    body without holding a second, encoded copy of the whole document"""
+    for start in range(0, len(text), size):
+        yield text[start:start + size].encode("utf-8")
+
 st.header("Upload CSV(s) to Add Data to Triple Store")
 uploaded_files = st.file_uploader(
     "Upload one or more CSV files", type=["csv"], accept_multiple_files=True
@@ -296,29 +468,32 @@ uploaded_files = st.file_uploader(
 if uploaded_files:
     converter = CSVToRDFConverter()
     
+    # Hash and parse the raw upload bytes; the decoded text is only kept for tracking
+    raw_contents = [uploaded_file.getvalue() for uploaded_file in uploaded_files]
+    file_hashes = [hashlib.md5(raw_content).hexdigest() for raw_content in raw_contents]
+    # The uploader keeps its files across reruns; files already tracked are
+    # in the store, so only new ones are converted and sent
+    pending = []
+    for uploaded_file, raw_content, file_hash in zip(uploaded_files, raw_contents, file_hashes):
+        if file_manager.get_file_by_id(file_hash):
+            st.info(f"{uploaded_file.name} is already in the triple store")
+        else:
+            pending.append((uploaded_file, raw_content, file_hash))
+    # Convert every file with its own source tracking, one after another;
+    # triples are counted while converting
+    conversions = converter.convert_each([io.BytesIO(raw_content) for _, raw_content, _ in pending],
+                                         [file_hash for _, _, file_hash in pending])
+    
     # Process each file individually to track them
     total_triples = 0
-    for uploaded_file in uploaded_files:
-        file_content = uploaded_file.read().decode("utf-8")
-        csv_buffer = io.StringIO(file_content)
-        
-        # Convert this specific file with source tracking
-        file_hash = hashlib.md5(file_content.encode()).hexdigest()
-        ttl_data = converter.convert_csvs_to_ttl([csv_buffer], source_file_id=file_hash)
-        
-        # Count triples in this file (more accurate counting)
-        triple_count = 0
-        for line in ttl_data.split('\n'):
-            line = line.strip()
-            if line and not line.startswith('@prefix') and not line.startswith('#') and not line.startswith('@'):
-                if ';' in line or line.endswith('.'):
-                    triple_count += 1
+    for (uploaded_file, raw_content, file_hash), (ttl_data, triple_count) in zip(pending, conversions):
+        file_content = raw_content.decode("utf-8")
         
         # Upload to triple store
-        resp = requests.post(data_url, data=ttl_data.encode("utf-8"), headers={"Content-Type": "text/turtle"})
+        resp = store_session.post(data_url, data=iter_utf8(ttl_data), headers={"Content-Type": "text/turtle"})
         if resp.status_code in (200, 201, 204):
             # Track the file
-            file_manager.add_file(uploaded_file.name, file_content, ttl_data, triple_count)
+            file_manager.add_file(uploaded_file.name, file_content, ttl_data, triple_count, file_hash)
             total_triples += triple_count
             st.success(f"✅ {uploaded_file.name} uploaded successfully! ({triple_count} triples)")
         else:
@@ -327,9 +502,9 @@ if uploaded_files:
     if total_triples > 0:
         st.success(f"🎉 All files uploaded! Total triples added: {total_triples}")
         
-        # Show preview of the data
-        st.subheader("Data Preview")
-        st.code(ttl_data, language="turtle")
+        # Show preview of the data; only the head is sent to the browser
+        with st.expander(f"Data Preview (first {_PREVIEW_LINES} lines)"):
+            st.code("\n".join(ttl_data.split("\n", _PREVIEW_LINES)[:_PREVIEW_LINES]), language="turtle")
 
 # --- Data Source Selection ---
 st.sidebar.header("Data Source")
@@ -340,15 +515,32 @@ data_source = st.sidebar.radio(
 )
 
 # --- Local File Loader ---
+# Turtle (@prefix) and SPARQL-style (PREFIX) prefix declarations
+_PREFIX_DECLARATION = re.compile(rb'^[ \t]*(?:@prefix|(?i:prefix))[ \t]+([^\s:]*):[ \t]*<([^>]*)>', re.MULTILINE)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_local_graph(file_hash, _ttl_file):
+    """Parse an uploaded Turtle file once per content hash; reruns reuse the graph"""
+    graph = Graph(store=_LOCAL_STORE)
+    # Hand the upload to the parser as a byte stream, no decoded copy
+    if _LOCAL_STORE == "Oxigraph":
+        # Oxigraph's Rust parser loads far faster than rdflib's Turtle
+        # parser, but leaves the file's prefixes unbound
+        graph.parse(source=_ttl_file, format="ox-turtle")
+        for prefix, namespace in _PREFIX_DECLARATION.findall(_ttl_file.getvalue()):
+            graph.bind(prefix.decode("utf-8"), namespace.decode("utf-8"))
+    else:
+        graph.parse(source=_ttl_file, format="turtle")
+    return graph
+
 local_graph = None
 if data_source == "Local File":
     st.sidebar.subheader("Load RDF Turtle File")
     ttl_file = st.sidebar.file_uploader("Upload RDF Turtle (.ttl) file", type=["ttl"], key="ttl_file")
     if ttl_file is not None:
-        ttl_content = ttl_file.read().decode("utf-8")
-        local_graph = Graph()
+        ttl_hash = hashlib.md5(ttl_file.getvalue()).hexdigest()
         try:
-            local_graph.parse(data=ttl_content, format="turtle")
+            local_graph = load_local_graph(ttl_hash, ttl_file)
             st.sidebar.success(f"Loaded {len(local_graph)} triples from file.")
         except Exception as e:
             st.sidebar.error(f"Error loading RDF: {e}")
@@ -364,163 +556,551 @@ triplestore_graph = get_graph(sparql_url)
 # --- Choose which graph to use for navigation/querying ---
 if data_source == "Triple Store":
     nav_graph = triplestore_graph
+    # The store only changes through uploads, deletes and clears, all of
+    # which show up in the tracked files or the store version
+    nav_key = ("store", sparql_url, tuple(sorted(f['id'] for f in file_manager.files)),
+               st.session_state.store_version)
     st.header("RDF Navigation & Querying (Triple Store)")
 else:
     nav_graph = local_graph
+    nav_key = ("local", ttl_hash) if local_graph is not None else None
     st.header("RDF Navigation & Querying (Local File)")
 
 # --- Unified RDF Navigator Logic ---
-from rdflib import URIRef
+from rdflib import URIRef, Literal, Namespace, RDF, RDFS, XSD
+from rdflib.plugins.sparql import prepareQuery
+
+EX = Namespace("http://example.org/dassault#")
+_QUERY_VAR = re.compile(r'[?$](\w+)')
+# Query results kept per navigator, oldest dropped first
+_RESULT_CACHE_SIZE = 128
+# Rows shown for a custom query; the rest are never converted
+_CUSTOM_QUERY_ROWS = 10000
+# Shortened URIs kept per navigator, least recently used dropped first
+_SHORT_URI_CACHE_SIZE = 65536
+_RESOURCES_QUERY = "SELECT DISTINCT ?node WHERE { { ?node ?p ?o } UNION { ?s ?p ?node } FILTER isIRI(?node) }"
+# What URIRef.n3() accepts: a scheme, then no spaces or characters IRIs forbid
+_IRI_RE = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:[^\s<>"{}|\\^`]*$')
+_EXISTS_QUERY = "ASK { { ?uri ?p ?o } UNION { ?s ?p ?uri } }"
+_RESOURCE_TRIPLES_QUERY = """
+SELECT ?role ?s ?p ?o WHERE {
+    { ?uri ?p ?o . BIND("subject" AS ?role) BIND(?uri AS ?s) }
+    UNION { ?s ?p ?uri . BIND("object" AS ?role) BIND(?uri AS ?o) }
+}
+"""
+# Links between ?r1 and ?r2 as (connection_type, path, intermediate, direction):
+# direct edges, and paths through or shared with a third node
+_CONNECTION_QUERIES = (
+    """
+    SELECT DISTINCT ?connection_type ?path ?intermediate ?direction WHERE {
+        { ?r1 ?path ?r2 . BIND("direct" AS ?connection_type) BIND("forward" AS ?direction) BIND("none" AS ?intermediate) }
+        UNION { ?r2 ?path ?r1 . BIND("direct" AS ?connection_type) BIND("reverse" AS ?direction) BIND("none" AS ?intermediate) }
+    }
+    """,
+    """
+    SELECT DISTINCT ?connection_type ?path ?intermediate ?direction WHERE {
+        { ?r1 ?p1 ?intermediate . ?intermediate ?p2 ?r2 . BIND("2-hop" AS ?connection_type) BIND("forward" AS ?direction) BIND(CONCAT(STR(?p1), " -> ", STR(?p2)) AS ?path) }
+        UNION { ?r2 ?p1 ?intermediate . ?intermediate ?p2 ?r1 . BIND("2-hop" AS ?connection_type) BIND("reverse" AS ?direction) BIND(CONCAT(STR(?p1), " -> ", STR(?p2)) AS ?path) }
+        UNION { ?r1 ?p1 ?intermediate . ?r2 ?p1 ?intermediate . BIND("shared" AS ?connection_type) BIND("bidirectional" AS ?direction) BIND(STR(?p1) AS ?path) }
+        UNION { ?intermediate ?p1 ?r1 . ?intermediate ?p1 ?r2 . BIND("inverse_shared" AS ?connection_type) BIND("bidirectional" AS ?direction) BIND(STR(?p1) AS ?path) }
+        FILTER(?intermediate != ?r1 && ?intermediate != ?r2)
+    }
+    """,
+)
+
+@functools.lru_cache(maxsize=256)
+def _prepare_query(query):
+    """Parse and translate a query once; the text is the cache key"""
+    return prepareQuery(query)
+
+def _substitute_bindings(query, bindings):
+    """Write bound variables into the query text as N3 terms, for stores that only accept text"""
+    return _QUERY_VAR.sub(lambda m: bindings[m.group(1)].n3() if m.group(1) in bindings else m.group(0), query)
 
 class RDFNavigator:
     def __init__(self, graph):
         self.graph = graph
+        # Remote stores answer SPARQL themselves; local graphs are indexed in memory
+        self.is_remote = isinstance(graph.store, SPARQLStore)
+        # Stores with their own SPARQL engine (Oxigraph, remote endpoints) take
+        # query text; rdflib's engine (the Memory store) reuses prepared queries
+        self.native_sparql = isinstance(graph.store, _SPARQL_ENGINE_STORES)
         self.namespaces = {}
+        self._results_lock = threading.Lock()
+        self.clear_caches()
         # Extract namespaces if possible
         try:
             for prefix, namespace in self.graph.namespaces():
                 self.namespaces[prefix] = namespace
         except Exception:
             pass
+        if self.is_remote:
+            # Endpoints do not report the prefixes of the data they hold;
+            # the converter always writes these
+            for prefix, namespace in (('ex', EX), ('rdfs', RDFS), ('xsd', XSD)):
+                self.namespaces.setdefault(prefix, namespace)
+        # Namespace strings are prepared once: by prefix for expanding, and
+        # longest first for shortening so the most specific prefix wins;
+        # recently shortened URIs are remembered
+        self._prefix_map = {prefix: str(namespace) for prefix, namespace in self.namespaces.items()}
+        self._ns_pairs = sorted(self._prefix_map.items(), key=lambda pair: len(pair[1]), reverse=True)
+        self.shorten_uri = functools.lru_cache(maxsize=_SHORT_URI_CACHE_SIZE)(self._shorten_uri)
     def get_resource_triples(self, resource_uri):
+        """Triples around a resource as ('subject'|'object', s, p, o), keeping
+        the rdflib terms so callers can tell URIs from literals by type"""
+        # Revisiting a resource (history, back-links) reuses its earlier scan
+        if resource_uri in self._triples:
+            return self._triples[resource_uri]
         try:
-            uri_ref = URIRef(resource_uri)
-            triples = []
-            for s, p, o in self.graph.triples((uri_ref, None, None)):
-                triples.append(('subject', str(s), str(p), str(o)))
-            for s, p, o in self.graph.triples((None, None, uri_ref)):
-                triples.append(('object', str(s), str(p), str(o)))
+            uri_ref = resource_uri if isinstance(resource_uri, URIRef) else URIRef(resource_uri)
+            if self.is_remote:
+                # Both directions in one request rather than a round trip each;
+                # outgoing triples are listed first, as below
+                rows, error = self.execute_sparql(_RESOURCE_TRIPLES_QUERY, {'uri': uri_ref})
+                if error:
+                    raise Exception(error)
+                triples = sorted(((str(role), s, p, o) for role, s, p, o in rows), key=lambda t: t[0] != 'subject')
+            else:
+                triples = [('subject', uri_ref, p, o) for p, o in self.graph.predicate_objects(uri_ref)]
+                triples += [('object', s, p, uri_ref) for s, p in self.graph.subject_predicates(uri_ref)]
+            self._triples[resource_uri] = triples
             return triples
         except Exception as e:
             st.error(f"Error retrieving triples: {str(e)}")
             return []
-    def execute_sparql(self, query):
+    def execute_sparql(self, query, bindings=None):
+        """Run a query, binding variables to values (rdflib terms) instead of
+        formatting them into the text, so each query text is parsed once.
+        The navigator lives as long as its graph version, so results are
+        remembered and repeated queries are not evaluated again."""
+        key = (query, frozenset(bindings.items()) if bindings else None)
+        if key in self._results:
+            return self._results[key], None
         try:
-            results = self.graph.query(query)
-            return list(results), None
+            if not self.native_sparql:
+                results = list(self.graph.query(_prepare_query(query), initBindings=bindings or {}))
+            else:
+                if bindings:
+                    query = _substitute_bindings(query, bindings)
+                results = list(self.graph.query(query))
         except Exception as e:
             return [], str(e)
+        # Queries may run on worker threads; eviction must not interleave
+        with self._results_lock:
+            if len(self._results) >= _RESULT_CACHE_SIZE:
+                del self._results[next(iter(self._results))]
+            self._results[key] = results
+        return results, None
+    def query_table(self, query, max_rows=None):
+        """Run an ad-hoc query straight into a table of strings, one column per
+        result variable; the rows are consumed once, up to max_rows, and not cached"""
+        try:
+            result = self.graph.query(query)
+            if result.type == 'ASK':
+                return pd.DataFrame({'ask': [str(result.askAnswer)]}), None
+            columns = [str(var) for var in result.vars] if result.vars else ['subject', 'predicate', 'object']
+            # Terms are stringified column by column rather than cell by cell
+            rows = list(itertools.islice(result, max_rows))
+            table = pd.DataFrame(rows, columns=columns, dtype=object)
+            return table.fillna('None').astype(str), None
+        except Exception as e:
+            return None, str(e)
+    def clear_caches(self):
+        """Forget everything derived from the graph; call after it changes"""
+        self._resources = None
+        self._triples = {}
+        self._results = {}
+        self._descriptions = {}
+        self._names = {}
+        self._labels = None
+        self._ir_er = None
+        self._domains = None
+        self._by_predicate = {}
+    def get_resources(self):
+        """Set of all subject/object URIs; scanning every triple is the
+        expensive part, so it is done once and shared by every caller"""
+        if self._resources is None and self.native_sparql:
+            # Engines with their own SPARQL deduplicate far faster than
+            # iterating every triple through Python
+            rows, error = self.execute_sparql(_RESOURCES_QUERY)
+            if error is None:
+                self._resources = frozenset(str(row[0]) for row in rows)
+        if self._resources is None:
+            resources = set()
+            for s, p, o in self.graph:
+                if isinstance(s, URIRef):
+                    resources.add(str(s))
+                if isinstance(o, URIRef):
+                    resources.add(str(o))
+            self._resources = frozenset(resources)
+        return self._resources
     def get_all_resources(self):
-        resources = set()
-        for s, p, o in self.graph:
-            if isinstance(s, URIRef):
-                resources.add(str(s))
-            if isinstance(o, URIRef):
-                resources.add(str(o))
-        return sorted(list(resources))
-    def shorten_uri(self, uri):
-        for prefix, namespace in self.namespaces.items():
-            if uri.startswith(str(namespace)):
-                return f"{prefix}:{uri[len(str(namespace)):]}"
-        return uri
+        return sorted(self.get_resources())
+    def get_first_resources(self, k=50):
+        """The first k resources in sorted order, without sorting them all"""
+        if self._resources is None and self.is_remote:
+            # The endpoint sorts and cuts the list, so only k URIs come back
+            # instead of every resource in the store
+            rows, error = self.execute_sparql(f"{_RESOURCES_QUERY} ORDER BY ?node LIMIT {int(k)}")
+            if error is None:
+                return [str(row[0]) for row in rows]
+        return heapq.nsmallest(k, self.get_resources())
+    def _shorten_uri(self, uri):
+        for prefix, namespace in self._ns_pairs:
+            if uri.startswith(namespace):
+                return f"{prefix}:{uri[len(namespace):]}"
+        return str(uri)
     def expand_uri(self, uri):
-        if ':' in uri and not uri.startswith('http'):
-            try:
-                prefix, local = uri.split(':', 1)
-                if prefix in self.namespaces:
-                    return str(self.namespaces[prefix]) + local
-            except:
-                pass
+        if not uri.startswith('http'):
+            prefix, sep, local = uri.partition(':')
+            namespace = self._prefix_map.get(prefix) if sep else None
+            if namespace is not None:
+                return namespace + local
         return uri
+    def resource_exists(self, uri):
+        """Whether uri appears as a subject or object in the graph, as
+        (exists, error)"""
+        if self.is_remote:
+            # One ASK, which stops at the first match, instead of two pattern lookups
+            results, error = self.execute_sparql(_EXISTS_QUERY, {'uri': URIRef(uri)})
+            return bool(results and results[0]), error
+        return uri in self.get_resources(), None
     def find_resource_by_name(self, name_or_uri):
+        """URI of the resource a name or URI refers to, as (uri, error)"""
+        # Remote lookups cost up to two queries; repeated names are answered
+        # from memory, but a failed lookup is tried again next time
+        if name_or_uri in self._names:
+            return self._names[name_or_uri], None
+        resource, error = self.lookup_resource_by_name(name_or_uri)
+        if not error:
+            self._names[name_or_uri] = resource
+        return resource, error
+    def lookup_resource_by_name(self, name_or_uri):
         expanded_uri = self.expand_uri(name_or_uri)
         if expanded_uri.startswith('http'):
-            uri_ref = URIRef(expanded_uri)
-            if (uri_ref, None, None) in self.graph or (None, None, uri_ref) in self.graph:
-                return expanded_uri
-        query = f"""
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX ex: <http://example.org/dassault#>
-        SELECT DISTINCT ?resource WHERE {{
-            {{ ?resource rdfs:label ?label . FILTER(LCASE(STR(?label)) = LCASE(\"{name_or_uri}\")) }}
-            UNION {{ ?resource a ex:Customer . ?resource rdfs:label ?label . FILTER(LCASE(STR(?label)) = LCASE(\"{name_or_uri}\")) }}
-            UNION {{ ?resource a ex:Module . ?resource rdfs:label ?label . FILTER(LCASE(STR(?label)) = LCASE(\"{name_or_uri}\")) }}
-            UNION {{ ?resource a ex:IncidentReport . ?resource rdfs:label ?label . FILTER(LCASE(STR(?label)) = LCASE(\"{name_or_uri}\")) }}
-            UNION {{ ?resource a ex:EnhancementRequest . ?resource ex:description ?label . FILTER(LCASE(STR(?label)) = LCASE(\"{name_or_uri}\")) }}
-        }} LIMIT 1
-        """
-        results, error = self.execute_sparql(query)
-        if results:
-            return str(results[0][0])
-        # Partial match
-        query_partial = f"""
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX ex: <http://example.org/dassault#>
-        SELECT DISTINCT ?resource WHERE {{
-            {{ ?resource rdfs:label ?label . FILTER(CONTAINS(LCASE(STR(?label)), LCASE(\"{name_or_uri}\"))) }}
-            UNION {{ ?resource a ex:Customer . ?resource rdfs:label ?label . FILTER(CONTAINS(LCASE(STR(?label)), LCASE(\"{name_or_uri}\"))) }}
-            UNION {{ ?resource a ex:Module . ?resource rdfs:label ?label . FILTER(CONTAINS(LCASE(STR(?label)), LCASE(\"{name_or_uri}\"))) }}
-            UNION {{ ?resource a ex:IncidentReport . ?resource rdfs:label ?label . FILTER(CONTAINS(LCASE(STR(?label)), LCASE(\"{name_or_uri}\"))) }}
-            UNION {{ ?resource a ex:EnhancementRequest . ?resource ex:description ?label . FILTER(CONTAINS(LCASE(STR(?label)), LCASE(\"{name_or_uri}\"))) }}
-        }} LIMIT 1
-        """
-        results, error = self.execute_sparql(query_partial)
-        if results:
-            return str(results[0][0])
-        return None
+            exists, error = self.resource_exists(expanded_uri)
+            if error:
+                return None, error
+            if exists:
+                return expanded_uri, None
+        if self.is_remote:
+            # Let the store filter the labels; the typed label branches were
+            # already covered by the plain rdfs:label one
+            for label_filter in ('LCASE(STR(?label)) = LCASE(?name)',
+                                 'CONTAINS(LCASE(STR(?label)), LCASE(?name))'):
+                query = f"""
+                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+                PREFIX ex: <http://example.org/dassault#>
+                SELECT DISTINCT ?resource WHERE {{
+                    {{ ?resource rdfs:label ?label . }}
+                    UNION {{ ?resource a ex:EnhancementRequest . ?resource ex:description ?label . }}
+                    FILTER({label_filter})
+                }} LIMIT 1
+                """
+                results, error = self.execute_sparql(query, {'name': Literal(name_or_uri)})
+                if error:
+                    return None, error
+                if results:
+                    return str(results[0][0]), None
+            return None, None
+        exact, uris, blob, starts = self.get_label_index()
+        name = name_or_uri.lower()
+        if name in exact:
+            return exact[name], None
+        # Partial match: one C-level search over all labels; without the
+        # separator in the name a hit cannot span two labels
+        if uris and '\0' not in name:
+            position = blob.find(name)
+            return (uris[bisect.bisect_right(starts, position) - 1] if position >= 0 else None), None
+        return None, None
+    def get_label_index(self):
+        """Lower-cased labels (and ER descriptions) of a local graph, built once"""
+        if self._labels is None:
+            labels = [(str(o).lower(), str(s)) for s, o in self.graph.subject_objects(RDFS.label)]
+            labels += [(str(o).lower(), str(s)) for s, o in self.graph.subject_objects(EX.description)
+                       if (s, RDF.type, EX.EnhancementRequest) in self.graph]
+            exact = {}
+            for label, uri in labels:
+                exact.setdefault(label, uri)
+            # All labels joined by NUL, with the offset where each one starts
+            blob = '\0'.join(label for label, uri in labels)
+            starts = list(itertools.accumulate((len(label) + 1 for label, uri in labels[:-1]), initial=0))
+            self._labels = (exact, [uri for label, uri in labels], blob, starts)
+        return self._labels
     def find_ir_er_by_id(self, ir_er_id):
+        """URI of the IR/ER an id refers to, as (uri, error)"""
         expanded_uri = self.expand_uri(ir_er_id)
         if expanded_uri.startswith('http'):
-            uri_ref = URIRef(expanded_uri)
-            if (uri_ref, None, None) in self.graph or (None, None, uri_ref) in self.graph:
-                return expanded_uri
-        query = f"""
-        PREFIX ex: <http://example.org/dassault#>
-        SELECT DISTINCT ?resource WHERE {{
-            {{ ?resource a ex:IncidentReport . FILTER(STRENDS(STR(?resource), \"{ir_er_id}\")) }}
-            UNION {{ ?resource a ex:EnhancementRequest . FILTER(STRENDS(STR(?resource), \"{ir_er_id}\")) }}
-        }} LIMIT 1
-        """
-        results, error = self.execute_sparql(query)
-        if results:
-            return str(results[0][0])
+            exists, error = self.resource_exists(expanded_uri)
+            if error:
+                return None, error
+            if exists:
+                return expanded_uri, None
+        if self.is_remote:
+            # The converter names IRs/ERs ex:IR_<id> and ex:ER_<id>; probing
+            # those URIs (and ex:<id> itself) is an index lookup, the suffix
+            # search scans every item
+            if _clean_id(ir_er_id) == ir_er_id:
+                candidates = " ".join(EX[name].n3() for name in (ir_er_id, f"IR_{ir_er_id}", f"ER_{ir_er_id}"))
+                results, error = self.execute_sparql(f"""
+                PREFIX ex: <http://example.org/dassault#>
+                SELECT ?resource WHERE {{
+                    VALUES ?resource {{ {candidates} }}
+                    VALUES ?type {{ ex:IncidentReport ex:EnhancementRequest }}
+                    ?resource a ?type .
+                }} LIMIT 1
+                """)
+                if error:
+                    return None, error
+                if results:
+                    return str(results[0][0]), None
+            query = """
+            PREFIX ex: <http://example.org/dassault#>
+            SELECT DISTINCT ?resource WHERE {
+                { ?resource a ex:IncidentReport . FILTER(STRENDS(STR(?resource), ?id)) }
+                UNION { ?resource a ex:EnhancementRequest . FILTER(STRENDS(STR(?resource), ?id)) }
+            } LIMIT 1
+            """
+            results, error = self.execute_sparql(query, {'id': Literal(ir_er_id)})
+            if error:
+                return None, error
+            if results:
+                return str(results[0][0]), None
+        else:
+            by_name, uris = self.get_ir_er_index()
+            if ir_er_id in by_name:
+                return by_name[ir_er_id], None
+            # Partial ids such as 'IR004' still match on the URI suffix
+            for uri in uris:
+                if uri.endswith(ir_er_id):
+                    return uri, None
         if not ir_er_id.startswith('ex:'):
             return self.find_ir_er_by_id(f"ex:{ir_er_id}")
-        return None
+        return None, None
+    def get_ir_er_index(self):
+        """IR/ER URIs of a local graph, keyed by their local name, built once"""
+        if self._ir_er is None:
+            uris = [str(s) for ir_er_type in (EX.IncidentReport, EX.EnhancementRequest)
+                    for s in self.graph.subjects(RDF.type, ir_er_type)]
+            self._ir_er = ({uri.rsplit('#', 1)[-1].rsplit('/', 1)[-1]: uri for uri in uris}, uris)
+        return self._ir_er
+    def get_domains(self):
+        """Distinct ex:mentionsFunction values, collected once per graph"""
+        if self._domains is None:
+            if self.is_remote:
+                rows, error = self.execute_sparql("""
+                PREFIX ex: <http://example.org/dassault#>
+                SELECT DISTINCT ?domain WHERE { ?item ex:mentionsFunction ?domain . }
+                """)
+                if error:
+                    return []
+                domains = [row[0] for row in rows]
+            else:
+                domains = list(dict.fromkeys(self.graph.objects(None, EX.mentionsFunction)))
+            self._domains = domains
+        return self._domains
+    def triples_for(self, predicate):
+        """(s, o) pairs of one predicate as a two-column DataFrame of strings,
+        read from the store's predicate index once"""
+        if predicate not in self._by_predicate:
+            pairs = list(self.graph.subject_objects(predicate))
+            self._by_predicate[predicate] = pd.DataFrame({
+                's': [str(s) for s, o in pairs],
+                'o': [str(o) for s, o in pairs],
+            }, dtype=str)
+        return self._by_predicate[predicate]
+    def product_issue_counts(self):
+        """Incidents and enhancements per product that has both, most issues
+        first, as (DataFrame, error)"""
+        columns = ["Product", "Incidents", "Enhancements", "Total Issues"]
+        if self.is_remote:
+            results, error = self.execute_sparql("""
+            PREFIX ex: <http://example.org/dassault#>
+            SELECT ?product (SUM(IF(?type = ex:IncidentReport, 1, 0)) AS ?incidentCount)
+                   (SUM(IF(?type = ex:EnhancementRequest, 1, 0)) AS ?enhancementCount)
+                   (COUNT(?issue) AS ?totalIssues) WHERE {
+                VALUES ?type { ex:IncidentReport ex:EnhancementRequest }
+                ?issue a ?type .
+                ?issue ex:product ?product .
+            }
+            GROUP BY ?product
+            HAVING (COUNT(DISTINCT ?type) = 2)
+            """)
+            df = pd.DataFrame(
+                ((str(row[0]), int(row[1]), int(row[2]), int(row[3])) for row in results),
+                columns=columns)
+            return df.sort_values("Total Issues", ascending=False, kind='stable', ignore_index=True), error
+        # Locally the counts are a join and a crosstab over two predicate
+        # tables, instead of a group-by in rdflib's evaluator
+        issue_types = [str(EX.IncidentReport), str(EX.EnhancementRequest)]
+        types = self.triples_for(RDF.type)
+        issues = types[types['o'].isin(issue_types)].merge(
+            self.triples_for(EX.product), on='s', suffixes=('_type', '_product'))
+        counts = pd.crosstab(issues['o_product'], issues['o_type']).reindex(columns=issue_types, fill_value=0)
+        counts = counts[(counts > 0).all(axis=1)]
+        df = pd.DataFrame({
+            "Product": counts.index,
+            "Incidents": counts[issue_types[0]].to_numpy(),
+            "Enhancements": counts[issue_types[1]].to_numpy(),
+        })
+        df["Total Issues"] = df["Incidents"] + df["Enhancements"]
+        return df.sort_values("Total Issues", ascending=False, kind='stable', ignore_index=True), None
+    def match_domains(self, keyword, uri=None):
+        """Domains equal to uri or whose text contains keyword, ignoring case
+        and reading '_' as a space"""
+        keyword = keyword.lower()
+        matches = []
+        for domain in self.get_domains():
+            text = str(domain).lower()
+            if keyword in text or keyword in text.replace('_', ' ') or (uri and str(domain) == uri):
+                matches.append(domain)
+        return matches
     def get_node_description(self, node_uri):
+        return self.get_node_descriptions([node_uri])[node_uri]
+    def get_node_descriptions(self, node_uris):
+        """Descriptions of several nodes; the uncached ones are looked up together"""
+        missing = [uri for uri in dict.fromkeys(node_uris) if uri not in self._descriptions]
+        if missing:
+            found = self.lookup_node_descriptions(missing)
+            if found is None:
+                # A failed lookup is not remembered, so the next call retries it
+                return {uri: self._descriptions.get(uri) for uri in node_uris}
+            self._descriptions.update(found)
+        return {uri: self._descriptions[uri] for uri in node_uris}
+    def lookup_node_descriptions(self, node_uris):
+        """'label: description', the description alone or the label of each
+        node, or None when it has neither; None altogether if the lookup failed"""
+        found = dict.fromkeys(node_uris)
+        # Anything that is not an IRI (a literal passed by mistake) has no
+        # description and must not break the batch
+        iris = [uri for uri in node_uris if _IRI_RE.match(uri)]
+        if not iris:
+            return found
         try:
-            query = f"""
-            PREFIX ex: <http://example.org/dassault#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?description ?label WHERE {{
-                <{node_uri}> ex:description ?description .
-                OPTIONAL {{ <{node_uri}> rdfs:label ?label }}
-            }} LIMIT 1
-            """
-            results, error = self.execute_sparql(query)
-            if results:
-                description = str(results[0][0])
-                label = str(results[0][1]) if results[0][1] else ""
-                return f"{label}: {description}" if label else description
-            query_label = f"""
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?label WHERE {{ <{node_uri}> rdfs:label ?label . }} LIMIT 1
-            """
-            results, error = self.execute_sparql(query_label)
-            if results:
-                return str(results[0][0])
-            return None
-        except:
+            if self.is_remote:
+                # One round trip for all nodes instead of up to two per node
+                query = f"""
+                PREFIX ex: <http://example.org/dassault#>
+                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+                SELECT ?node ?description ?label WHERE {{
+                    VALUES ?node {{ {" ".join(URIRef(uri).n3() for uri in iris)} }}
+                    {{ ?node ex:description ?description . OPTIONAL {{ ?node rdfs:label ?label }} }}
+                    UNION {{ ?node rdfs:label ?label }}
+                }}
+                """
+                results, error = self.execute_sparql(query)
+                if error:
+                    return None
+                rows = [(str(node), description, label) for node, description, label in results]
+            else:
+                rows = []
+                for uri in iris:
+                    node = URIRef(uri)
+                    description = next(self.graph.objects(node, EX.description), None)
+                    label = next(self.graph.objects(node, RDFS.label), None)
+                    rows.append((uri, description, label))
+        except Exception:
             return None
+        # A description (with its label, if any) wins over a bare label
+        described, labelled = {}, {}
+        for uri, description, label in rows:
+            if description is not None:
+                described.setdefault(uri, (description, label))
+            elif label is not None:
+                labelled.setdefault(uri, label)
+        for uri in node_uris:
+            if uri in described:
+                description, label = described[uri]
+                found[uri] = f"{label}: {description}" if label else str(description)
+            elif uri in labelled:
+                found[uri] = str(labelled[uri])
+        return found
     def find_connections(self, resource1, resource2):
-        query = f"""
-        SELECT DISTINCT ?connection_type ?path ?intermediate ?direction WHERE {{
-            {{ <{resource1}> ?path <{resource2}> . BIND("direct" AS ?connection_type) BIND("forward" AS ?direction) BIND("none" AS ?intermediate) }}
-            UNION {{ <{resource2}> ?path <{resource1}> . BIND("direct" AS ?connection_type) BIND("reverse" AS ?direction) BIND("none" AS ?intermediate) }}
-            UNION {{ <{resource1}> ?p1 ?intermediate . ?intermediate ?p2 <{resource2}> . FILTER(?intermediate != <{resource1}> && ?intermediate != <{resource2}>) BIND("2-hop" AS ?connection_type) BIND("forward" AS ?direction) BIND(CONCAT(STR(?p1), " -> ", STR(?p2)) AS ?path) }}
-            UNION {{ <{resource2}> ?p1 ?intermediate . ?intermediate ?p2 <{resource1}> . FILTER(?intermediate != <{resource1}> && ?intermediate != <{resource2}>) BIND("2-hop" AS ?connection_type) BIND("reverse" AS ?direction) BIND(CONCAT(STR(?p1), " -> ", STR(?p2)) AS ?path) }}
-            UNION {{ <{resource1}> ?p1 ?intermediate . <{resource2}> ?p2 ?intermediate . FILTER(?intermediate != <{resource1}> && ?intermediate != <{resource2}>) FILTER(?p1 = ?p2) BIND("shared" AS ?connection_type) BIND("bidirectional" AS ?direction) BIND(STR(?p1) AS ?path) }}
-            UNION {{ ?intermediate ?p1 <{resource1}> . ?intermediate ?p2 <{resource2}> . FILTER(?intermediate != <{resource1}> && ?intermediate != <{resource2}>) FILTER(?p1 = ?p2) BIND("inverse_shared" AS ?connection_type) BIND("bidirectional" AS ?direction) BIND(STR(?p1) AS ?path) }}
-        }} ORDER BY ?connection_type ?direction
+        if not self.is_remote:
+            return self.find_local_connections(URIRef(resource1), URIRef(resource2)), None
+        # Direct links and links through a third node are separate requests,
+        # sent together, so the wait is one round trip instead of two
+        bindings = {'r1': URIRef(resource1), 'r2': URIRef(resource2)}
+        with ThreadPoolExecutor(max_workers=len(_CONNECTION_QUERIES)) as pool:
+            answers = list(pool.map(lambda query: self.execute_sparql(query, bindings), _CONNECTION_QUERIES))
+        errors = [error for results, error in answers if error]
+        if errors:
+            return [], errors[0]
+        # ORDER BY ?connection_type ?direction across both answers
+        results = [row for results, error in answers for row in results]
+        return sorted(results, key=lambda row: (str(row[0]), str(row[3]))), None
+    def find_customer_items(self, customer_uri):
+        """Items of a customer as (item, type, status, title, domain) rows"""
+        if not self.is_remote:
+            return self.find_local_customer_items(URIRef(customer_uri)), None
+        query = """
+        PREFIX ex: <http://example.org/dassault#>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        SELECT DISTINCT ?item ?type ?status ?title ?domain WHERE {
+            ?item ex:belongsToCustomer ?customer .
+            ?item rdf:type ?type .
+            OPTIONAL { ?item ex:status ?status }
+            OPTIONAL { ?item ex:description ?title }
+            OPTIONAL { ?item ex:severity ?domain }
+        }
+        ORDER BY ?type ?item
         """
-        results, error = self.execute_sparql(query)
-        return results, error
+        return self.execute_sparql(query, {'customer': URIRef(customer_uri)})
+    def find_local_customer_items(self, customer):
+        """find_customer_items for in-memory graphs: the query shape is fixed,
+        so each item's properties are point lookups instead of OPTIONAL joins"""
+        graph = self.graph
+        rows = []
+        for item in graph.subjects(EX.belongsToCustomer, customer):
+            # Missing optional properties stay unbound (None), as in SPARQL
+            rows += itertools.product([item], graph.objects(item, RDF.type),
+                                      list(graph.objects(item, EX.status)) or [None],
+                                      list(graph.objects(item, EX.description)) or [None],
+                                      list(graph.objects(item, EX.severity)) or [None])
+        # ORDER BY ?type ?item
+        rows.sort(key=lambda row: (str(row[1]), str(row[0])))
+        return rows
+    def find_local_connections(self, r1, r2):
+        """find_connections for in-memory graphs, from the two resources'
+        outgoing and incoming edges instead of a 6-branch UNION join"""
+        out1 = list(self.graph.predicate_objects(r1))
+        out2 = list(self.graph.predicate_objects(r2))
+        in1 = list(self.graph.subject_predicates(r1))
+        in2 = list(self.graph.subject_predicates(r2))
+        preds_into1, preds_into2 = {}, {}
+        for preds_into, incoming in ((preds_into1, in1), (preds_into2, in2)):
+            for s, p in incoming:
+                preds_into.setdefault(s, []).append(p)
+        ends = (r1, r2)
+        rows = [("direct", str(p), "none", "forward") for p, o in out1 if o == r2]
+        rows += [("direct", str(p), "none", "reverse") for p, o in out2 if o == r1]
+        rows += [("2-hop", f"{p1} -> {p2}", str(mid), "forward")
+                 for p1, mid in out1 if mid not in ends for p2 in preds_into2.get(mid, ())]
+        rows += [("2-hop", f"{p1} -> {p2}", str(mid), "reverse")
+                 for p1, mid in out2 if mid not in ends for p2 in preds_into1.get(mid, ())]
+        rows += [("shared", str(p), str(mid), "bidirectional")
+                 for p, mid in set(out1) & set(out2) if mid not in ends]
+        rows += [("inverse_shared", str(p), str(mid), "bidirectional")
+                 for mid, p in set(in1) & set(in2) if mid not in ends]
+        # DISTINCT ... ORDER BY ?connection_type ?direction
+        return sorted(dict.fromkeys(rows), key=lambda row: (row[0], row[3]))
 
 # --- Session State Initialization ---
 if 'current_resource_uri' not in st.session_state:
     st.session_state.current_resource_uri = None
 if 'navigation_history' not in st.session_state:
-    st.session_state.navigation_history = []
+    st.session_state.navigation_history = {}
+
+# Navigation history is an insertion-ordered dict used as an LRU set
+_HISTORY_LIMIT = 100
+
+def record_visit(uri):
+    """Move uri to the most recent end of the history, dropping the oldest entry past the limit"""
+    history = st.session_state.navigation_history
+    history.pop(uri, None)
+    history[uri] = None
+    if len(history) > _HISTORY_LIMIT:
+        del history[next(iter(history))]
 
 # --- Main UI ---
 st.markdown('<div class="main-header"><h1>RDF Navigator</h1><p>Explore and navigate RDF semantic data with powerful SPARQL queries</p></div>', unsafe_allow_html=True)
@@ -530,7 +1110,24 @@ if nav_graph is None:
     st.info("Please upload an RDF Turtle (.ttl) file or select Triple Store to begin exploration")
     st.stop()
 
-navigator = RDFNavigator(nav_graph)
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_navigator(nav_key, _graph):
+    """One navigator per graph version, so its scans and lookups survive reruns"""
+    return RDFNavigator(_graph)
+
+# Other clients (Fuseki's own UI, scripts) can change the store without the
+# app knowing, so store navigators and their caches are rebuilt this often
+_STORE_NAVIGATOR_TTL = 60
+
+@st.cache_resource(show_spinner=False, max_entries=8, ttl=_STORE_NAVIGATOR_TTL)
+def get_store_navigator(nav_key, _graph):
+    """Like get_navigator, but expiring so outside changes to the store show up"""
+    return RDFNavigator(_graph)
+
+if data_source == "Triple Store":
+    navigator = get_store_navigator(nav_key, nav_graph)
+else:
+    navigator = get_navigator(nav_key, nav_graph)
 
 # --- Tabs for different functionalities ---
 tab1, tab2, tab3, tab4 = st.tabs(["Graph Explorer", "SPARQL Queries", "Graph Visualization", "File Management"])
@@ -549,7 +1146,7 @@ with tab1:
     with col2:
         st.write("Or select:")
         if st.button("Random Resource"):
-            resources = navigator.get_all_resources()
+            resources = list(navigator.get_resources())
             if resources:
                 import random
                 random_resource = random.choice(resources)
@@ -562,7 +1159,7 @@ with tab1:
             st.session_state.current_resource_uri = expanded_uri
             st.rerun()
     # Resource dropdown (showing first 50 resources)
-    resources = navigator.get_all_resources()[:50]
+    resources = navigator.get_first_resources(50)
     if resources:
         selected_resource = st.selectbox(
             "Or select from available resources (first 50):",
@@ -580,45 +1177,35 @@ with tab1:
         st.code(current_resource, language="text")
         triples = navigator.get_resource_triples(current_resource)
         if triples:
-            if current_resource not in st.session_state.navigation_history:
-                st.session_state.navigation_history.append(current_resource)
+            record_visit(current_resource)
             st.success(f"Found {len(triples)} triples for this resource")
             subjects = [t for t in triples if t[0] == 'subject']
             objects = [t for t in triples if t[0] == 'object']
             if subjects:
                 st.subheader("As Subject (outgoing relationships)")
-                for idx, (_, s, p, o) in enumerate(subjects):
-                    with st.container():
-                        col1, col2, col3 = st.columns([2, 2, 2])
-                        with col1:
-                            st.write(f"**Property:** {navigator.shorten_uri(p)}")
-                        with col2:
-                            st.write(f"**Object:** {navigator.shorten_uri(o)}")
-                        with col3:
-                            try:
-                                if o.startswith('http') and not o.startswith('http://www.w3.org/2001/XMLSchema#'):
-                                    if st.button(f"Navigate to {navigator.shorten_uri(o)}", key=f"nav_obj_{idx}_{hash(o)}"):
-                                        st.session_state.current_resource_uri = o
-                                        st.rerun()
-                            except:
-                                pass
+                st.dataframe(pd.DataFrame({
+                    "Property": [navigator.shorten_uri(p) for _, s, p, o in subjects],
+                    "Object": [navigator.shorten_uri(o) for _, s, p, o in subjects],
+                }), use_container_width=True, hide_index=True)
             if objects:
                 st.subheader("As Object (incoming relationships)")
-                for idx, (_, s, p, o) in enumerate(objects):
-                    with st.container():
-                        col1, col2, col3 = st.columns([2, 2, 2])
-                        with col1:
-                            st.write(f"**Subject:** {navigator.shorten_uri(s)}")
-                        with col2:
-                            st.write(f"**Property:** {navigator.shorten_uri(p)}")
-                        with col3:
-                            try:
-                                if s.startswith('http') and not s.startswith('http://www.w3.org/2001/XMLSchema#'):
-                                    if st.button(f"Navigate to {navigator.shorten_uri(s)}", key=f"nav_subj_{idx}_{hash(s)}"):
-                                        st.session_state.current_resource_uri = s
-                                        st.rerun()
-                            except:
-                                pass
+                st.dataframe(pd.DataFrame({
+                    "Subject": [navigator.shorten_uri(s) for _, s, p, o in objects],
+                    "Property": [navigator.shorten_uri(p) for _, s, p, o in objects],
+                }), use_container_width=True, hide_index=True)
+            # One navigation widget for all linked resources instead of a button per triple
+            linked = [o for _, s, p, o in subjects] + [s for _, s, p, o in objects]
+            linked = [str(uri) for uri in dict.fromkeys(linked) if isinstance(uri, URIRef)]
+            if linked:
+                target = st.selectbox(
+                    "Navigate to a linked resource:",
+                    options=[""] + linked,
+                    format_func=lambda x: navigator.shorten_uri(x) if x else "Select a resource...",
+                    key="navigate_dropdown"
+                )
+                if target and target != st.session_state.current_resource_uri:
+                    st.session_state.current_resource_uri = target
+                    st.rerun()
         else:
             st.warning("No triples found for this resource. Please check the URI or try a different resource.")
             if resources:
@@ -628,12 +1215,67 @@ with tab1:
     # Navigation history
     if st.session_state.navigation_history:
         st.header("Navigation History")
-        for i, resource in enumerate(reversed(st.session_state.navigation_history[-5:])):
+        for i, resource in enumerate(itertools.islice(reversed(st.session_state.navigation_history), 5)):
             if st.button(f"Back {navigator.shorten_uri(resource)}", key=f"nav_{i}"):
                 st.session_state.current_resource_uri = resource
                 st.rerun()
 
 # --- SPARQL Queries Tab (full UI from rdf_navigator.py) ---
+def compact_table(df, categories=(), integers=()):
+    """Store repeated labels as categoricals and counts as int32, in place"""
+    for column in categories:
+        df[column] = df[column].astype('category')
+    for column in integers:
+        df[column] = df[column].astype('int32')
+    return df
+
+def result_table(results, columns, uris=(), categories=(), integers=()):
+    """Query rows as a table in one pass; columns in uris are shortened,
+    the rest become text (unbound as ''), then compacted"""
+    df = pd.DataFrame(results, columns=columns, dtype=object)
+    for column in columns:
+        if column in uris:
+            df[column] = df[column].astype(str).map(navigator.shorten_uri)
+        elif column not in integers:
+            df[column] = df[column].fillna('').astype(str)
+    return compact_table(df, categories, integers)
+
+# Query 4 analyses, by name; independent, so Analyze All can run them together
+_PRIORITY_QUERIES = {
+    "High Priority Incidents": """
+    PREFIX ex: <http://example.org/dassault#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT DISTINCT ?incident ?label ?customer ?severity ?priority ?module ?status WHERE {
+        VALUES ?priority { "P0" "P1" }
+        ?incident ex:priority ?priority .
+        ?incident a ex:IncidentReport .
+        ?incident rdfs:label ?label .
+        ?incident ex:belongsToCustomer ?customer .
+        ?incident ex:severity ?severity .
+        ?incident ex:mentionsFunction ?module .
+        ?incident ex:status ?status .
+    }
+    """,
+    "Module Risk Assessment": """
+    PREFIX ex: <http://example.org/dassault#>
+    SELECT ?module ?priority ?status WHERE {
+        ?incident a ex:IncidentReport .
+        ?incident ex:mentionsFunction ?module .
+        ?incident ex:priority ?priority .
+        ?incident ex:status ?status .
+    }
+    """,
+    "Severity vs Domain Analysis": """
+    PREFIX ex: <http://example.org/dassault#>
+    SELECT ?domain ?severity WHERE {
+        ?incident a ex:IncidentReport .
+        ?incident ex:belongsToCustomer ?customer .
+        ?incident ex:severity ?severity .
+        ?customer ex:domain ?domain .
+    }
+    """,
+}
+
 with tab2:
     st.header("SPARQL Query Tools")
     # Query Scenario 1: Find Link Between Two IRs/Functions/ERs
@@ -646,9 +1288,11 @@ with tab2:
         resource2 = st.text_input("Second IR/ER ID", key="q1_r2", help="Enter IR ID (e.g., 'IR_IR005') or ER ID (e.g., 'ER_ER005')")
     if st.button("Find Connections", key="q1_btn"):
         if resource1 and resource2:
-            expanded_r1 = navigator.find_ir_er_by_id(resource1)
-            expanded_r2 = navigator.find_ir_er_by_id(resource2)
-            if not expanded_r1:
+            expanded_r1, error1 = navigator.find_ir_er_by_id(resource1)
+            expanded_r2, error2 = navigator.find_ir_er_by_id(resource2)
+            if error1 or error2:
+                st.error(f"Query error: {error1 or error2}")
+            elif not expanded_r1:
                 st.error(f"IR/ER '{resource1}' not found. Try using ID like 'IR_IR004' or 'ER_ER004'.")
             elif not expanded_r2:
                 st.error(f"IR/ER '{resource2}' not found. Try using ID like 'IR_IR005' or 'ER_ER005'.")
@@ -679,13 +1323,9 @@ with tab2:
                         else:
                             desc = connection_type
                             detail = path
-                        connection_data.append({
-                            "Connection Type": desc,
-                            "Details": detail,
-                            "Direction": direction,
-                            "Intermediate/Property": navigator.shorten_uri(intermediate) if intermediate != "none" else "N/A"
-                        })
-                    df = pd.DataFrame(connection_data)
+                        connection_data.append((desc, detail, direction,
+                                                navigator.shorten_uri(intermediate) if intermediate != "none" else "N/A"))
+                    df = pd.DataFrame(connection_data, columns=["Connection Type", "Details", "Direction", "Intermediate/Property"])
                     st.dataframe(df, use_container_width=True)
                 else:
                     st.info("No connections found between these resources")
@@ -697,23 +1337,13 @@ with tab2:
     customer_name = st.text_input("Customer Name or URI", key="q2_customer", help="Enter customer name (e.g., 'Tesla') or URI (e.g., 'ex:Customer_Tesla')")
     if st.button("Get Customer Status", key="q2_btn"):
         if customer_name:
-            expanded_customer = navigator.find_resource_by_name(customer_name)
-            if not expanded_customer:
+            expanded_customer, error = navigator.find_resource_by_name(customer_name)
+            if error:
+                st.error(f"Query error: {error}")
+            elif not expanded_customer:
                 st.error(f"Customer '{customer_name}' not found. Try using full URI or check spelling.")
             else:
-                query = f"""
-                PREFIX ex: <http://example.org/dassault#>
-                PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                SELECT DISTINCT ?item ?type ?status ?title ?domain WHERE {{
-                    ?item ex:belongsToCustomer <{expanded_customer}> .
-                    ?item rdf:type ?type .
-                    OPTIONAL {{ ?item ex:status ?status }}
-                    OPTIONAL {{ ?item ex:description ?title }}
-                    OPTIONAL {{ ?item ex:severity ?domain }}
-                }}
-                ORDER BY ?type ?item
-                """
-                results, error = navigator.execute_sparql(query)
+                results, error = navigator.find_customer_items(expanded_customer)
                 if error:
                     st.error(f"Query error: {error}")
                 elif results:
@@ -734,39 +1364,29 @@ with tab2:
     if st.button("Find Similar Requests", key="q3_btn"):
         if domain_filter:
             expanded_filter = navigator.expand_uri(domain_filter)
-            query = f"""
-            PREFIX ex: <http://example.org/dassault#>
-            SELECT DISTINCT ?customer ?item ?title ?domain WHERE {{
-                ?item ex:belongsToCustomer ?customer .
-                ?item ex:mentionsFunction ?domain .
-                OPTIONAL {{ ?item ex:description ?title }}
-                FILTER(
-                    ?domain = <{domain_filter}> ||
-                    ?domain = <{expanded_filter}> ||
-                    CONTAINS(LCASE(STR(?domain)), LCASE("{domain_filter}")) ||
-                    CONTAINS(LCASE(REPLACE(STR(?domain), "_", " ")), LCASE("{domain_filter}")) ||
-                    CONTAINS(LCASE(REPLACE(REPLACE(STR(?domain), "^.*[/#]", ""), "_", " ")), LCASE("{domain_filter}"))
-                )
-            }}
-            ORDER BY ?customer ?item
-            """
-            results, error = navigator.execute_sparql(query)
+            # Match the keyword against the few distinct domains in Python and
+            # hand the store the hits, instead of a string FILTER per item
+            domains = navigator.match_domains(domain_filter, expanded_filter)
+            if domains:
+                query = f"""
+                PREFIX ex: <http://example.org/dassault#>
+                SELECT DISTINCT ?customer ?item ?title ?domain WHERE {{
+                    VALUES ?domain {{ {" ".join(domain.n3() for domain in domains)} }}
+                    ?item ex:mentionsFunction ?domain .
+                    ?item ex:belongsToCustomer ?customer .
+                    OPTIONAL {{ ?item ex:description ?title }}
+                }}
+                """
+                results, error = navigator.execute_sparql(query)
+            else:
+                results, error = [], None
             if error:
                 st.error(f"Query error: {error}")
             elif results:
-                data = []
-                for row in results:
-                    customer = navigator.shorten_uri(str(row[0]))
-                    item = navigator.shorten_uri(str(row[1]))
-                    title = str(row[2]) if row[2] else "No description"
-                    domain = navigator.shorten_uri(str(row[3]))
-                    data.append({
-                        "Customer": customer,
-                        "Item": item,
-                        "Title": title,
-                        "Domain": domain
-                    })
-                df = pd.DataFrame(data)
+                df = result_table(results, ["Customer", "Item", "Title", "Domain"],
+                                  uris=["Customer", "Item", "Domain"], categories=["Customer", "Domain"])
+                df = df.sort_values(["Customer", "Item"], ignore_index=True)
+                df["Title"] = df["Title"].replace("", "No description")
                 st.success(f"Found {len(df)} items matching domain '{domain_filter}'")
                 st.dataframe(df, use_container_width=True)
                 unique_customers = df['Customer'].nunique()
@@ -778,18 +1398,11 @@ with tab2:
             else:
                 st.info(f"No requests found for domain '{domain_filter}'")
                 st.warning("Try different domain names like 'security', 'reporting', 'authentication', etc.")
-                debug_query = """
-                PREFIX ex: <http://example.org/dassault#>
-                SELECT DISTINCT ?domain WHERE {
-                    ?item ex:mentionsFunction ?domain .
-                }
-                LIMIT 10
-                """
-                debug_results, debug_error = navigator.execute_sparql(debug_query)
-                if not debug_error and debug_results:
+                domains = navigator.get_domains()
+                if domains:
                     st.info("Available domains in your data (first 10):")
-                    for row in debug_results:
-                        st.text(f"• {navigator.shorten_uri(str(row[0]))}")
+                    for domain in domains[:10]:
+                        st.text(f"• {navigator.shorten_uri(domain)}")
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Query Scenario 4: Priority Analysis & Risk Assessment
@@ -797,90 +1410,76 @@ with tab2:
     st.subheader("Query 4: Priority Analysis & Risk Assessment")
     analysis_type = st.selectbox(
         "Select Analysis Type:",
-        ["High Priority Incidents", "Module Risk Assessment", "Severity vs Domain Analysis"],
+        list(_PRIORITY_QUERIES),
         key="q4_type"
     )
-    if st.button("Analyze Priority & Risk", key="q4_btn"):
-        if analysis_type == "High Priority Incidents":
-            query = """
-            PREFIX ex: <http://example.org/dassault#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT DISTINCT ?incident ?label ?customer ?severity ?priority ?module ?status WHERE {
-                ?incident a ex:IncidentReport .
-                ?incident rdfs:label ?label .
-                ?incident ex:belongsToCustomer ?customer .
-                ?incident ex:severity ?severity .
-                ?incident ex:priority ?priority .
-                ?incident ex:mentionsFunction ?module .
-                ?incident ex:status ?status .
-                FILTER(?priority IN ("P0", "P1"))
-            }
-            ORDER BY ?priority ?severity
-            """
+    analyze_one = st.button("Analyze Priority & Risk", key="q4_btn")
+    analyze_all = st.button("Analyze All", key="q4_all_btn")
+    if analyze_all and navigator.is_remote:
+        # Overlap the three round trips to the store; the results are then
+        # read back from the navigator's cache below
+        with ThreadPoolExecutor(max_workers=len(_PRIORITY_QUERIES)) as pool:
+            list(pool.map(navigator.execute_sparql, _PRIORITY_QUERIES.values()))
+    analyses = list(_PRIORITY_QUERIES) if analyze_all else [analysis_type] if analyze_one else []
+    for analysis in analyses:
+        if analyze_all:
+            st.markdown(f"#### {analysis}")
+        if analysis == "High Priority Incidents":
+            query = _PRIORITY_QUERIES["High Priority Incidents"]
             results, error = navigator.execute_sparql(query)
             if error:
                 st.error(f"Query error: {error}")
             elif results:
-                data = []
-                for row in results:
-                    data.append({
-                        "Incident": navigator.shorten_uri(str(row[0])),
-                        "Label": str(row[1]),
-                        "Customer": navigator.shorten_uri(str(row[2])),
-                        "Severity": str(row[3]),
-                        "Priority": str(row[4]),
-                        "Module": navigator.shorten_uri(str(row[5])),
-                        "Status": str(row[6])
-                    })
-                df = pd.DataFrame(data)
+                df = result_table(results, ["Incident", "Label", "Customer", "Severity", "Priority", "Module", "Status"],
+                                  uris=["Incident", "Customer", "Module"],
+                                  categories=["Customer", "Severity", "Priority", "Module", "Status"])
+                df = df.sort_values(["Priority", "Severity"], ignore_index=True)
                 st.success(f"Found {len(df)} high-priority incidents")
                 st.dataframe(df, use_container_width=True)
+                priorities = df['Priority'].value_counts()
+                statuses = df['Status'].value_counts()
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("Critical (P0)", len(df[df['Priority'] == 'P0']))
+                    st.metric("Critical (P0)", priorities.get('P0', 0))
                 with col2:
-                    st.metric("High (P1)", len(df[df['Priority'] == 'P1']))
+                    st.metric("High (P1)", priorities.get('P1', 0))
                 with col3:
-                    st.metric("Open Issues", len(df[df['Status'] == 'Open']))
+                    st.metric("Open Issues", statuses.get('Open', 0))
             else:
                 st.info("No high-priority incidents found")
-        elif analysis_type == "Module Risk Assessment":
-            query = """
-            PREFIX ex: <http://example.org/dassault#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?module ?moduleLabel ?incidentCount ?criticalCount ?highCount ?openCount WHERE {
-                {
-                    SELECT ?module (COUNT(?incident) AS ?incidentCount) 
-                           (COUNT(IF(?priority = "P0", ?incident, ?dummy)) AS ?criticalCount)
-                           (COUNT(IF(?priority = "P1", ?incident, ?dummy)) AS ?highCount)
-                           (COUNT(IF(?status = "Open", ?incident, ?dummy)) AS ?openCount) WHERE {
-                        ?incident a ex:IncidentReport .
-                        ?incident ex:mentionsFunction ?module .
-                        ?incident ex:priority ?priority .
-                        ?incident ex:status ?status .
-                        BIND("dummy" AS ?dummy)
-                    }
-                    GROUP BY ?module
-                }
-                ?module rdfs:label ?moduleLabel .
-            }
-            ORDER BY DESC(?incidentCount)
-            """
+        elif analysis == "Module Risk Assessment":
+            # Flat pattern match in the store; the per-module counts are one
+            # groupby in pandas instead of a sub-SELECT aggregate, and labels
+            # are fetched for the grouped modules only rather than every incident
+            query = _PRIORITY_QUERIES["Module Risk Assessment"]
             results, error = navigator.execute_sparql(query)
+            df = pd.DataFrame()
+            if not error and results:
+                incidents = result_table(results, ["Module", "Priority", "Status"])
+                counts = pd.DataFrame({
+                    "Module": incidents["Module"],
+                    "Total Incidents": 1,
+                    "Critical (P0)": incidents["Priority"] == "P0",
+                    "High (P1)": incidents["Priority"] == "P1",
+                    "Open Issues": incidents["Status"] == "Open",
+                }).groupby("Module", as_index=False).sum()
+                modules = " ".join(URIRef(module).n3() for module in counts["Module"] if _IRI_RE.match(module))
+                label_results, error = navigator.execute_sparql(f"""
+                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+                SELECT ?module ?label WHERE {{
+                    VALUES ?module {{ {modules} }}
+                    ?module rdfs:label ?label .
+                }}
+                """) if modules else ([], None)
+                labels = result_table(label_results, ["Module", "Module Name"])
+                df = (counts.merge(labels, on="Module")
+                      .sort_values("Total Incidents", ascending=False, kind="stable", ignore_index=True)
+                      [["Module", "Module Name", "Total Incidents", "Critical (P0)", "High (P1)", "Open Issues"]])
             if error:
                 st.error(f"Query error: {error}")
-            elif results:
-                data = []
-                for row in results:
-                    data.append({
-                        "Module": navigator.shorten_uri(str(row[0])),
-                        "Module Name": str(row[1]),
-                        "Total Incidents": int(str(row[2])),
-                        "Critical (P0)": int(str(row[3])),
-                        "High (P1)": int(str(row[4])),
-                        "Open Issues": int(str(row[5]))
-                    })
-                df = pd.DataFrame(data)
+            elif len(df):
+                df["Module"] = df["Module"].map(navigator.shorten_uri)
+                compact_table(df, integers=["Total Incidents", "Critical (P0)", "High (P1)", "Open Issues"])
                 st.success(f"Risk assessment for {len(df)} modules")
                 st.dataframe(df, use_container_width=True)
                 st.subheader("Module Risk Heatmap")
@@ -891,34 +1490,21 @@ with tab2:
                 st.dataframe(risk_df.sort_values('Risk Score', ascending=False), use_container_width=True)
             else:
                 st.info("No module risk data found")
-        elif analysis_type == "Severity vs Domain Analysis":
-            query = """
-            PREFIX ex: <http://example.org/dassault#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?domain ?severity (COUNT(?incident) AS ?incidentCount) WHERE {
-                ?incident a ex:IncidentReport .
-                ?incident ex:belongsToCustomer ?customer .
-                ?incident ex:severity ?severity .
-                ?customer ex:domain ?domain .
-            }
-            GROUP BY ?domain ?severity
-            ORDER BY ?domain ?severity
-            """
+        elif analysis == "Severity vs Domain Analysis":
+            # The store only matches the pattern; counting and the pivot are
+            # one crosstab in pandas instead of a GROUP BY in the query engine
+            query = _PRIORITY_QUERIES["Severity vs Domain Analysis"]
             results, error = navigator.execute_sparql(query)
             if error:
                 st.error(f"Query error: {error}")
             elif results:
-                data = []
-                for row in results:
-                    data.append({
-                        "Domain": str(row[0]),
-                        "Severity": str(row[1]),
-                        "Incident Count": int(str(row[2]))
-                    })
-                df = pd.DataFrame(data)
+                incidents = result_table(results, ["Domain", "Severity"])
+                pivot_df = pd.crosstab(incidents["Domain"], incidents["Severity"])
+                df = pivot_df.stack().rename("Incident Count").reset_index()
+                df = df[df["Incident Count"] > 0].reset_index(drop=True)
+                compact_table(df, integers=["Incident Count"])
                 st.success(f"Severity analysis across {df['Domain'].nunique()} domains")
                 st.dataframe(df, use_container_width=True)
-                pivot_df = df.pivot(index='Domain', columns='Severity', values='Incident Count').fillna(0)
                 st.subheader("Severity Distribution by Domain")
                 st.dataframe(pivot_df, use_container_width=True)
             else:
@@ -935,41 +1521,11 @@ with tab2:
     )
     if st.button("Analyze Product Performance", key="q5_btn"):
         if product_analysis == "Product Incident Comparison":
-            query = """
-            PREFIX ex: <http://example.org/dassault#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?product ?incidentCount ?enhancementCount ?totalIssues WHERE {
-                {
-                    SELECT ?product (COUNT(?incident) AS ?incidentCount) WHERE {
-                        ?incident a ex:IncidentReport .
-                        ?incident ex:product ?product .
-                    }
-                    GROUP BY ?product
-                }
-                {
-                    SELECT ?product (COUNT(?enhancement) AS ?enhancementCount) WHERE {
-                        ?enhancement a ex:EnhancementRequest .
-                        ?enhancement ex:product ?product .
-                    }
-                    GROUP BY ?product
-                }
-                BIND(?incidentCount + ?enhancementCount AS ?totalIssues)
-            }
-            ORDER BY DESC(?totalIssues)
-            """
-            results, error = navigator.execute_sparql(query)
+            df, error = navigator.product_issue_counts()
             if error:
                 st.error(f"Query error: {error}")
-            elif results:
-                data = []
-                for row in results:
-                    data.append({
-                        "Product": str(row[0]),
-                        "Incidents": int(str(row[1])),
-                        "Enhancements": int(str(row[2])),
-                        "Total Issues": int(str(row[3]))
-                    })
-                df = pd.DataFrame(data)
+            elif len(df):
+                compact_table(df, integers=["Incidents", "Enhancements", "Total Issues"])
                 st.success(f"Product performance analysis for {len(df)} products")
                 st.dataframe(df, use_container_width=True)
                 col1, col2, col3 = st.columns(3)
@@ -991,29 +1547,23 @@ with tab2:
                 ?enhancement ex:priority ?priority .
             }
             GROUP BY ?product ?requestType ?priority
-            ORDER BY ?product ?requestType ?priority
             """
             results, error = navigator.execute_sparql(query)
             if error:
                 st.error(f"Query error: {error}")
             elif results:
-                data = []
-                for row in results:
-                    data.append({
-                        "Product": str(row[0]),
-                        "Request Type": str(row[1]),
-                        "Priority": str(row[2]),
-                        "Count": int(str(row[3]))
-                    })
-                df = pd.DataFrame(data)
+                df = result_table(results, ["Product", "Request Type", "Priority", "Count"],
+                                  categories=["Priority"], integers=["Count"])
+                df = df.sort_values(["Product", "Request Type", "Priority"], ignore_index=True)
                 st.success(f"Enhancement analysis for {df['Product'].nunique()} products")
                 st.dataframe(df, use_container_width=True)
                 pivot_df = df.pivot_table(
                     index='Product', 
                     columns='Request Type', 
                     values='Count', 
-                    aggfunc='sum'
-                ).fillna(0)
+                    aggfunc='sum',
+                    fill_value=0
+                )
                 st.subheader("Enhancement Request Types by Product")
                 st.dataframe(pivot_df, use_container_width=True)
             else:
@@ -1024,39 +1574,26 @@ with tab2:
             PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
             SELECT ?product ?module ?moduleLabel ?incidentCount ?enhancementCount WHERE {
                 {
-                    SELECT ?product ?module (COUNT(?incident) AS ?incidentCount) WHERE {
-                        ?incident a ex:IncidentReport .
-                        ?incident ex:product ?product .
-                        ?incident ex:mentionsFunction ?module .
-                    }
-                    GROUP BY ?product ?module
-                }
-                {
-                    SELECT ?product ?module (COUNT(?enhancement) AS ?enhancementCount) WHERE {
-                        ?enhancement a ex:EnhancementRequest .
-                        ?enhancement ex:product ?product .
-                        ?enhancement ex:mentionsFunction ?module .
+                    SELECT ?product ?module (SUM(IF(?type = ex:IncidentReport, 1, 0)) AS ?incidentCount)
+                           (SUM(IF(?type = ex:EnhancementRequest, 1, 0)) AS ?enhancementCount) WHERE {
+                        VALUES ?type { ex:IncidentReport ex:EnhancementRequest }
+                        ?issue a ?type .
+                        ?issue ex:product ?product .
+                        ?issue ex:mentionsFunction ?module .
                     }
                     GROUP BY ?product ?module
+                    HAVING (COUNT(DISTINCT ?type) = 2)
                 }
                 ?module rdfs:label ?moduleLabel .
             }
-            ORDER BY ?product ?module
             """
             results, error = navigator.execute_sparql(query)
             if error:
                 st.error(f"Query error: {error}")
             elif results:
-                data = []
-                for row in results:
-                    data.append({
-                        "Product": str(row[0]),
-                        "Module": navigator.shorten_uri(str(row[1])),
-                        "Module Name": str(row[2]),
-                        "Incidents": int(str(row[3])),
-                        "Enhancements": int(str(row[4]))
-                    })
-                df = pd.DataFrame(data)
+                df = result_table(results, ["Product", "Module", "Module Name", "Incidents", "Enhancements"],
+                                  uris=["Module"], categories=["Module"], integers=["Incidents", "Enhancements"])
+                df = df.sort_values(["Product", "Module"], ignore_index=True)
                 st.success(f"Product-module patterns for {df['Product'].nunique()} products")
                 st.dataframe(df, use_container_width=True)
                 st.subheader("Top Modules by Issues per Product")
@@ -1076,154 +1613,148 @@ with tab2:
     )
     if st.button("Execute Custom Query"):
         if custom_query:
-            results, error = navigator.execute_sparql(custom_query)
+            # One row past the cap tells a truncated result from one that fits exactly
+            df, error = navigator.query_table(custom_query, _CUSTOM_QUERY_ROWS + 1)
             if error:
                 st.error(f"Query error: {error}")
-            elif results:
-                if results:
-                    columns = [str(var) for var in results[0]]
-                    data = [[str(binding) for binding in row] for row in results]
-                    df = pd.DataFrame(data, columns=columns)
-                    st.dataframe(df, use_container_width=True)
+            elif len(df):
+                if len(df) > _CUSTOM_QUERY_ROWS:
+                    st.warning(f"Showing the first {_CUSTOM_QUERY_ROWS:,} rows; add a LIMIT to the query to choose which")
+                    df = df.iloc[:_CUSTOM_QUERY_ROWS]
+                st.dataframe(df, use_container_width=True)
             else:
                 st.info("Query returned no results")
 
 # --- Graph Visualization Tab (full UI from rdf_navigator.py) ---
+# Node colours by the entity tag that starts the URI's local name (IR_..., ER_...)
+_NODE_COLORS = {"IR": "#ff7675", "ER": "#74b9ff", "Module": "#55a3ff", "Customer": "#00b894"}
+
+def node_tag(node):
+    """Entity tag of a node id ('IR', 'Module', ...), or None without one"""
+    tag, sep, _ = node.rpartition('#')[2].rpartition('/')[2].partition('_')
+    return tag if sep and tag in _NODE_COLORS else None
+
+def node_color(node, default_color):
+    return _NODE_COLORS.get(node_tag(node), default_color)
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl=_STORE_NAVIGATOR_TTL)
+def render_graph(nav_key, current_uri, _navigator):
+    """PyVis page and node descriptions for a resource's neighbourhood, built
+    once per graph version and resource instead of on every rerun; expires
+    with the store navigators so outside changes show up"""
+    from pyvis.network import Network
+    net = Network(height="600px", width="100%", bgcolor="#ffffff", font_color="black")
+    net.add_node(current_uri, label=_navigator.shorten_uri(current_uri), color="#ff6b6b", size=25)
+    triples = _navigator.get_resource_triples(current_uri)
+    added_nodes = {current_uri}
+    neighbours = []
+    for triple_type, s, p, o in triples[:20]:
+        # Only resources can have descriptions; literal objects are drawn but not looked up
+        described = isinstance(o if triple_type == 'subject' else s, URIRef)
+        # Node ids are plain strings so they match current_uri
+        s, p, o = str(s), str(p), str(o)
+        # The neighbour is the object of outgoing triples and the subject of incoming ones
+        node, default_color = (o, "#4ecdc4") if triple_type == 'subject' else (s, "#45b7d1")
+        if node not in added_nodes:
+            if described:
+                neighbours.append(node)
+            net.add_node(node, label=_navigator.shorten_uri(node), color=node_color(node, default_color), size=15)
+            added_nodes.add(node)
+        net.add_edge(s, o, label=_navigator.shorten_uri(p), color="#95a5a6")
+    # Describe every neighbour with one lookup rather than one query per node
+    node_descriptions = _navigator.get_node_descriptions(neighbours)
+    net.set_options("""
+    var options = {
+        "physics": {
+            "enabled": true,
+            "stabilization": {"iterations": 100}
+        }
+    }
+    """)
+    # Render the page in memory instead of round-tripping through a temp file
+    html_content = net.generate_html(notebook=False)
+    custom_js = '''
+    <script>
+    function setupNodeClick() {
+        var network = window.network;
+        if (!network) {
+            setTimeout(setupNodeClick, 200);
+            return;
+        }
+        network.on('click', function(params) {
+            if(params.nodes.length > 0) {
+                var nodeId = params.nodes[0];
+                window.parent.postMessage({type: 'node_click', nodeId: nodeId}, '*');
+            }
+        });
+    }
+    setupNodeClick();
+    window.addEventListener('message', (event) => {
+        if(event.data && event.data.type === 'set_resource') {
+        }
+    });
+    </script>
+    '''
+    return html_content.replace('</body>', custom_js + '</body>'), node_descriptions
+
 with tab3:
     st.header("Graph Visualization")
     if st.session_state.current_resource_uri:
         st.subheader(f"Visualizing connections for: {navigator.shorten_uri(st.session_state.current_resource_uri)}")
-        from pyvis.network import Network
-        net = Network(height="600px", width="100%", bgcolor="#ffffff", font_color="black")
-        current_uri = st.session_state.current_resource_uri
-        net.add_node(current_uri, label=navigator.shorten_uri(current_uri), color="#ff6b6b", size=25)
-        triples = navigator.get_resource_triples(current_uri)
-        added_nodes = {current_uri}
-        node_descriptions = {}
-        for triple_type, s, p, o in triples[:20]:
-            if triple_type == 'subject':
-                if o not in added_nodes:
-                    description = navigator.get_node_description(o)
-                    node_descriptions[o] = description
-                    node_color = "#4ecdc4"
-                    if "IR_" in str(o):
-                        node_color = "#ff7675"
-                    elif "ER_" in str(o):
-                        node_color = "#74b9ff"
-                    elif "Module_" in str(o):
-                        node_color = "#55a3ff"
-                    elif "Customer_" in str(o):
-                        node_color = "#00b894"
-                    net.add_node(o, label=navigator.shorten_uri(o), color=node_color, size=15)
-                    added_nodes.add(o)
-                net.add_edge(s, o, label=navigator.shorten_uri(p), color="#95a5a6")
-            else:
-                if s not in added_nodes:
-                    description = navigator.get_node_description(s)
-                    node_descriptions[s] = description
-                    node_color = "#45b7d1"
-                    if "IR_" in str(s):
-                        node_color = "#ff7675"
-                    elif "ER_" in str(s):
-                        node_color = "#74b9ff"
-                    elif "Module_" in str(s):
-                        node_color = "#55a3ff"
-                    elif "Customer_" in str(s):
-                        node_color = "#00b894"
-                    net.add_node(s, label=navigator.shorten_uri(s), color=node_color, size=15)
-                    added_nodes.add(s)
-                net.add_edge(s, o, label=navigator.shorten_uri(p), color="#95a5a6")
         try:
-            net.set_options("""
-            var options = {
-                "physics": {
-                    "enabled": true,
-                    "stabilization": {"iterations": 100}
-                }
-            }
-            """)
-            tmp_file = None
-            try:
-                tmp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.html')
-                net.save_graph(tmp_file.name)
-                tmp_file.close()
-                with open(tmp_file.name, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                custom_js = '''
-                <script>
-                function setupNodeClick() {
-                    var network = window.network;
-                    if (!network) {
-                        setTimeout(setupNodeClick, 200);
-                        return;
+            html_content, node_descriptions = render_graph(nav_key, st.session_state.current_resource_uri, navigator)
+            st.markdown('''<script>
+            window.addEventListener('message', (event) => {
+                if(event.data && event.data.type === 'node_click') {
+                    const nodeId = event.data.nodeId;
+                    const input = window.parent.document.querySelector('input[data-testid="stNodeClick"]');
+                    if(input) {
+                        input.value = nodeId;
+                        input.dispatchEvent(new Event('input', { bubbles: true }));
                     }
-                    network.on('click', function(params) {
-                        if(params.nodes.length > 0) {
-                            var nodeId = params.nodes[0];
-                            window.parent.postMessage({type: 'node_click', nodeId: nodeId}, '*');
-                        }
-                    });
                 }
-                setupNodeClick();
-                window.addEventListener('message', (event) => {
-                    if(event.data && event.data.type === 'set_resource') {
-                    }
-                });
-                </script>
-                '''
-                html_content = html_content.replace('</body>', custom_js + '</body>')
-                st.markdown('''<script>
-                window.addEventListener('message', (event) => {
-                    if(event.data && event.data.type === 'node_click') {
-                        const nodeId = event.data.nodeId;
-                        const input = window.parent.document.querySelector('input[data-testid="stNodeClick"]');
-                        if(input) {
-                            input.value = nodeId;
-                            input.dispatchEvent(new Event('input', { bubbles: true }));
-                        }
-                    }
-                });
-                </script>''', unsafe_allow_html=True)
-                node_click = st.text_input('','',key='stNodeClick',label_visibility='collapsed')
-                if node_click:
+            });
+            </script>''', unsafe_allow_html=True)
+            node_click = st.text_input('','',key='stNodeClick',label_visibility='collapsed')
+            # The hidden input keeps its value across reruns; act on each click once
+            if node_click and node_click != st.session_state.handled_node_click:
+                st.session_state.handled_node_click = node_click
+                if node_click != st.session_state.current_resource_uri:
                     st.session_state.current_resource_uri = node_click
                     st.rerun()
-                st.components.v1.html(html_content, height=600)
-                if node_descriptions:
-                    st.subheader("Node Descriptions")
-                    st.info("Click on nodes in the graph above to see their details. Below are descriptions of connected nodes:")
-                    ir_descriptions = {k: v for k, v in node_descriptions.items() if v and "IR_" in str(k)}
-                    er_descriptions = {k: v for k, v in node_descriptions.items() if v and "ER_" in str(k)}
-                    module_descriptions = {k: v for k, v in node_descriptions.items() if v and "Module_" in str(k)}
-                    customer_descriptions = {k: v for k, v in node_descriptions.items() if v and "Customer_" in str(k)}
-                    if ir_descriptions:
-                        st.markdown("**Incident Reports (IRs):**")
-                        for node, desc in ir_descriptions.items():
-                            with st.expander(f"{navigator.shorten_uri(node)}"):
-                                st.write(desc)
-                    if er_descriptions:
-                        st.markdown("**Enhancement Requests (ERs):**")
-                        for node, desc in er_descriptions.items():
-                            with st.expander(f"{navigator.shorten_uri(node)}"):
-                                st.write(desc)
-                    if module_descriptions:
-                        st.markdown("**Modules:**")
-                        for node, desc in module_descriptions.items():
-                            with st.expander(f"{navigator.shorten_uri(node)}"):
-                                st.write(desc if desc else "Module information")
-                    if customer_descriptions:
-                        st.markdown("**Customers:**")
-                        for node, desc in customer_descriptions.items():
-                            with st.expander(f"{navigator.shorten_uri(node)}"):
-                                st.write(desc if desc else "Customer information")
-            except Exception as e:
-                st.error(f"Error generating visualization: {str(e)}")
-            finally:
-                if tmp_file and os.path.exists(tmp_file.name):
-                    try:
-                        os.unlink(tmp_file.name)
-                    except:
-                        pass
+            st.components.v1.html(html_content, height=600)
+            if node_descriptions:
+                st.subheader("Node Descriptions")
+                st.info("Click on nodes in the graph above to see their details. Below are descriptions of connected nodes:")
+                # Sort the described nodes by entity tag in one pass
+                described = defaultdict(dict)
+                for node, desc in node_descriptions.items():
+                    if desc:
+                        described[node_tag(node)][node] = desc
+                ir_descriptions = described["IR"]
+                er_descriptions = described["ER"]
+                module_descriptions = described["Module"]
+                customer_descriptions = described["Customer"]
+                if ir_descriptions:
+                    st.markdown("**Incident Reports (IRs):**")
+                    for node, desc in ir_descriptions.items():
+                        with st.expander(f"{navigator.shorten_uri(node)}"):
+                            st.write(desc)
+                if er_descriptions:
+                    st.markdown("**Enhancement Requests (ERs):**")
+                    for node, desc in er_descriptions.items():
+                        with st.expander(f"{navigator.shorten_uri(node)}"):
+                            st.write(desc)
+                if module_descriptions:
+                    st.markdown("**Modules:**")
+                    for node, desc in module_descriptions.items():
+                        with st.expander(f"{navigator.shorten_uri(node)}"):
+                            st.write(desc if desc else "Module information")
+                if customer_descriptions:
+                    st.markdown("**Customers:**")
+                    for node, desc in customer_descriptions.items():
+                        with st.expander(f"{navigator.shorten_uri(node)}"):
+                            st.write(desc if desc else "Customer information")
         except Exception as e:
             st.error(f"Error generating visualization: {str(e)}")
     else:
@@ -1285,9 +1816,10 @@ with tab4:
                                 ?s <http://example.org/dassault#sourceFile> "{file_info['id']}" .
                             }}
                             """
-                            resp = requests.post(update_url, data={"update": delete_query})
+                            resp = store_session.post(update_url, data={"update": delete_query})
                             if resp.status_code == 200:
                                 file_manager.delete_file(file_info['id'])
+                                st.session_state.store_version += 1
                                 st.success(f"✅ Deleted {file_info['filename']} and its triples!")
                                 st.rerun()
                             else:
@@ -1319,11 +1851,11 @@ with tab4:
                 try:
                     # Clear all data from triple store
                     clear_query = "CLEAR ALL"
-                    resp = requests.post(update_url, data={"update": clear_query})
+                    resp = store_session.post(update_url, data={"update": clear_query})
                     if resp.status_code == 200:
                         # Clear file tracking
-                        file_manager.files = []
-                        file_manager.save_files()
+                        file_manager.clear_files()
+                        st.session_state.store_version += 1
                         st.success("✅ All files and triples deleted!")
                         st.rerun()
                     else:
@@ -1372,7 +1904,7 @@ with tab4:
 @st.cache_data(show_spinner=False)
 def current_resource_uri(uri):
     st.session_state.current_resource_uri = uri
-    st.session_state.navigation_history.append(uri)
+    record_visit(uri)
     return uri
 
 st.info("All data and queries are now persistent and shared via the triple store, or private via local file. Upload more CSVs to add more data to the triple store!") 
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""Tests for the CSV to Turtle converter in rdf_navigator_unified.py"""
+import ast
+import io
+import unittest
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent.parent / "rdf_navigator_unified.py"
+
+
+def load_app_definitions():
+    """Namespace with the app's imports, classes, functions and module
+    constants; the Streamlit page itself is not run"""
+    tree = ast.parse(APP.read_text(encoding="utf-8"))
+    tree.body = [node for node in tree.body
+                 if isinstance(node, (ast.Import, ast.ImportFrom, ast.Try, ast.FunctionDef, ast.ClassDef))
+                 or (isinstance(node, ast.Assign)
+                     and all(isinstance(target, ast.Name) and target.id.startswith('_') for target in node.targets))]
+    namespace = {'__name__': 'rdf_navigator_unified'}
+    exec(compile(tree, str(APP), 'exec'), namespace)
+    return namespace
+
+
+def convert(namespace, text):
+    converter = namespace['CSVToRDFConverter']()
+    buf = []
+    triple_count = converter.convert_file(io.BytesIO(text.encode("utf-8")), buf)
+    return "".join(buf), triple_count
+
+
+class BooleanColumnTest(unittest.TestCase):
+    CSV = "IR_ID,flag,done\nIR1,True,True\nIR2,,False\nIR3,False,True\n"
+
+    def test_bool_column_with_blanks_is_typed_like_bool_column(self):
+        ttl, triple_count = convert(load_app_definitions(), self.CSV)
+        self.assertEqual(triple_count, 8)
+        self.assertIn('ex:flag "True"^^xsd:integer', ttl)
+        self.assertIn('ex:flag "False"^^xsd:integer', ttl)
+        self.assertIn('ex:done "False"^^xsd:integer', ttl)
+        self.assertNotIn('ex:flag "True" ', ttl)
+
+    def test_chunked_read_matches_whole_file(self):
+        whole = convert(load_app_definitions(), self.CSV)
+        for rows in (1, 2):
+            chunked = load_app_definitions()
+            chunked['_CSV_CHUNK_BYTES'] = 0
+            chunked['_CSV_CHUNK_ROWS'] = rows
+            self.assertEqual(convert(chunked, self.CSV), whole)
+
+
+if __name__ == "__main__":
+    unittest.main()